@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import Base
-from app.models import Category, Developer, App  # Import models to register them
+from app.models import Category, Developer, App, CategoryStats, CategoryYearStats  # Import models to register them
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
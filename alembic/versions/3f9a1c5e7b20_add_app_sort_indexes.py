@@ -0,0 +1,31 @@
+"""add app sort indexes
+
+Revision ID: 3f9a1c5e7b20
+Revises: 8d2e4a7c1f36
+Create Date: 2026-10-16 14:03:55.614820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c5e7b20'
+down_revision: Union[str, None] = '8d2e4a7c1f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # Keyset pagination of GET /apps/ seeks on (sort key, id)
+    op.create_index('idx_apps_rating_id', 'apps', ['rating', 'id'], unique=False)
+    op.create_index('idx_apps_rating_count_id', 'apps', ['rating_count', 'id'], unique=False)
+    op.create_index('idx_apps_released_date_id', 'apps', ['released_date', 'id'], unique=False)
+    op.create_index('idx_apps_last_updated_id', 'apps', ['last_updated', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_apps_last_updated_id', table_name='apps')
+    op.drop_index('idx_apps_released_date_id', table_name='apps')
+    op.drop_index('idx_apps_rating_count_id', table_name='apps')
+    op.drop_index('idx_apps_rating_id', table_name='apps')
@@ -0,0 +1,65 @@
+"""add category stats
+
+Revision ID: 5b7e2d9a4c18
+Revises: 3f9a1c5e7b20
+Create Date: 2026-10-16 23:52:10.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9a4c18'
+down_revision: Union[str, None] = '3f9a1c5e7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        'category_stats',
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('app_count', sa.BigInteger(), nullable=False),
+        sa.Column('rated_apps', sa.BigInteger(), nullable=False),
+        sa.Column('rating_sum', sa.Numeric(), nullable=False),
+        sa.Column('free_count', sa.BigInteger(), nullable=False),
+        sa.Column('paid_count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('category_id')
+    )
+    op.create_table(
+        'category_year_stats',
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('released_count', sa.BigInteger(), nullable=False),
+        sa.Column('updated_count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('category_id', 'year')
+    )
+
+    # Fill in the statistics of the apps already imported
+    op.execute("""
+        INSERT INTO category_stats (category_id, app_count, rated_apps, rating_sum, free_count, paid_count)
+        SELECT category_id, count(*), count(rating), coalesce(sum(rating), 0),
+               count(*) FILTER (WHERE is_free), count(*) FILTER (WHERE NOT is_free)
+        FROM apps
+        WHERE category_id IS NOT NULL
+        GROUP BY category_id
+    """)
+    op.execute("""
+        INSERT INTO category_year_stats (category_id, year, released_count, updated_count)
+        SELECT category_id, year, sum(released), sum(updated)
+        FROM apps
+        CROSS JOIN LATERAL (VALUES
+            (extract(year FROM released_date)::int, 1, 0),
+            (extract(year FROM last_updated)::int, 0, 1)
+        ) AS dates (year, released, updated)
+        WHERE category_id IS NOT NULL AND year IS NOT NULL
+        GROUP BY category_id, year
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('category_year_stats')
+    op.drop_table('category_stats')
@@ -0,0 +1,55 @@
+"""add search indexes
+
+Revision ID: 7c3d1e8f2a95
+Revises: 5b7e2d9a4c18
+Create Date: 2026-10-17 00:14:37.502916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d1e8f2a95'
+down_revision: Union[str, None] = '5b7e2d9a4c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Name words weigh more than the words of the package name, whose dots separate words
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', replace(coalesce(app_id, ''), '.', ' ')), 'B')"
+)
+
+def upgrade() -> None:
+    # Trigram indexes serve ILIKE '%...%', including a leading wildcard
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('idx_apps_name_trgm', 'apps', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('idx_categories_name_trgm', 'categories', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('idx_developers_name_trgm', 'developers', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('idx_developers_email_trgm', 'developers', ['email'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+
+    # Rewrites apps once to fill the column, later writes keep it up to date
+    op.add_column('apps', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    op.create_index('idx_apps_search_vector', 'apps', ['search_vector'], unique=False, postgresql_using='gin')
+
+    # Apps of developers matched by name are looked up by developer
+    op.create_index('idx_apps_developer_id', 'apps', ['developer_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_apps_developer_id', table_name='apps')
+    op.drop_index('idx_apps_search_vector', table_name='apps')
+    op.drop_column('apps', 'search_vector')
+    op.drop_index('idx_developers_email_trgm', table_name='developers')
+    op.drop_index('idx_developers_name_trgm', table_name='developers')
+    op.drop_index('idx_categories_name_trgm', table_name='categories')
+    op.drop_index('idx_apps_name_trgm', table_name='apps')
@@ -0,0 +1,24 @@
+"""add app row hash
+
+Revision ID: 8d2e4a7c1f36
+Revises: c6f1f665fa9b
+Create Date: 2026-10-16 09:12:41.207153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4a7c1f36'
+down_revision: Union[str, None] = 'c6f1f665fa9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column('apps', sa.Column('row_hash', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('apps', 'row_hash')
@@ -1,87 +1,163 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, extract
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, case, func, literal, select, union_all, update, Float
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict
+from contextlib import AsyncExitStack
 from datetime import date
+from decimal import Decimal
+import csv
+import io
+import json
+import re
 
-from ..database import get_db, get_last_query_duration
-from ..models import App, Category, Developer
-from ..schemas import AppCreate, AppDetail, AppList, ResponseModel
+from ..cache import cached, mark_written
+from ..category_stats import STATS_FIELDS, apply_app_changes, stats_values
+from ..config import BULK_MAX_ITEMS, DB_SEARCH_STATEMENT_TIMEOUT_MS
+from ..database import get_db, get_lazy_db, get_db_with_timeout, get_query_metadata, open_session
+from ..models import App, Category, CategoryYearStats, Developer
+from ..schemas import AppCreate, AppDetail, AppList, AppSearchResult, BulkItemResult, MetadataModel, PageMetadataModel, ResponseModel, PageResponseModel
+from .arrow import arrow_response, wants_arrow
+from .fast_json import json_response
+from .pagination import encode_cursor, decode_cursor, keyset_order, keyset_page
+from .totals import count_rows
 
 router = APIRouter(
     prefix="/apps",
     tags=["apps"]
 )
 
+# Sort keys of list_apps and the type of their cursor values, each has an (key, id) index
+SORT_COLUMNS = {
+    'rating': Decimal,
+    'rating_count': int,
+    'released_date': date,
+    'last_updated': date,
+}
+
+# Columns of AppList, returned by the list, search and export endpoints
+APP_LIST_COLUMNS = (
+    App.id,
+    App.name,
+    App.app_id,
+    App.rating,
+    App.rating_count,
+    App.installs,
+    App.is_free,
+    App.price,
+    App.released_date,
+    App.last_updated,
+    App.content_rating,
+    App.category_id,
+    App.developer_id,
+)
+
+def search_tsquery(q: str, mode: str):
+    """
+    Full text query of a search: the words of q, or in prefix mode any words
+    starting with them. None if q has no words.
+    """
+    if mode == "prefix":
+        words = re.findall(r"\w+", q)
+        if not words:
+            return None
+        return func.to_tsquery('simple', ' & '.join(f"{word}:*" for word in words))
+    if not re.search(r"\w", q):
+        return None
+    return func.websearch_to_tsquery('simple', q)
+
 @router.get("/yearly-stats/{category_id}")
+@cached("apps")
 async def get_yearly_statistics(
     category_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_lazy_db)
 ):
     """Get yearly statistics for released and updated apps in a category."""
     
-    # Query for released apps count per year
-    released_query = (
-        db.query(
-            extract('year', App.released_date).label('year'),
-            func.count().label('count')
-        )
-        .filter(App.category_id == category_id)
-        .group_by(extract('year', App.released_date))
-    )
-    
-    print("\n=== Released Apps SQL Query ===")
-    print(released_query.statement.compile(compile_kwargs={"literal_binds": True}))
-    print("========================\n")
-    
-    released_stats = released_query.all()
-    
-    # Query for updated apps count per year
-    updated_query = (
-        db.query(
-            extract('year', App.last_updated).label('year'),
-            func.count().label('count')
-        )
-        .filter(App.category_id == category_id)
-        .group_by(extract('year', App.last_updated))
-    )
-    
-    print("\n=== Updated Apps SQL Query ===")
-    print(updated_query.statement.compile(compile_kwargs={"literal_binds": True}))
-    print("========================\n")
-    
-    updated_stats = updated_query.all()
+    # Counts per year are kept in category_year_stats by the write handlers and the importer
+    year_stats = (await db.execute(
+        select(CategoryYearStats.year, CategoryYearStats.released_count, CategoryYearStats.updated_count)
+        .filter(CategoryYearStats.category_id == category_id)
+        .order_by(CategoryYearStats.year)
+    )).all()
     
     # Convert to dictionary format
     result = {
         'data': {
-            'released': {int(year): count for year, count in released_stats if year},
-            'updated': {int(year): count for year, count in updated_stats if year}
+            'released': {year: released for year, released, _ in year_stats if year and released},
+            'updated': {year: updated for year, _, updated in year_stats if year and updated}
         },
-        'metadata': {
-            'query_duration_ms': get_last_query_duration()
-        }
+        'metadata': get_query_metadata()
     }
     
     return result
 
-@router.get("/", response_model=ResponseModel[List[AppList]])
+class AppFilters:
+    """Filters of the app list, shared by list_apps and export_apps."""
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        category_id: Optional[int] = None,
+        developer_id: Optional[int] = None,
+        is_free: Optional[bool] = None,
+        min_rating: Optional[float] = Query(None, ge=0, le=5),
+        content_rating: Optional[str] = None,
+        has_ads: Optional[bool] = None,
+        is_editors_choice: Optional[bool] = None,
+        released_after: Optional[date] = None,
+        released_before: Optional[date] = None,
+    ):
+        self.name = name
+        self.category_id = category_id
+        self.developer_id = developer_id
+        self.is_free = is_free
+        self.min_rating = min_rating
+        self.content_rating = content_rating
+        self.has_ads = has_ads
+        self.is_editors_choice = is_editors_choice
+        self.released_after = released_after
+        self.released_before = released_before
+
+    def apply(self, query):
+        # Apply index-optimized filters first
+        if self.is_free is not None:
+            query = query.filter(App.is_free == self.is_free)
+        if self.category_id is not None:
+            query = query.filter(App.category_id == self.category_id)
+        if self.min_rating:
+            query = query.filter(App.rating >= self.min_rating)
+            
+        # Apply remaining filters
+        if self.name:
+            query = query.filter(App.name.ilike(f"%{self.name}%"))
+        if self.developer_id:
+            query = query.filter(App.developer_id == self.developer_id)
+        if self.content_rating:
+            query = query.filter(App.content_rating == self.content_rating)
+        if self.has_ads is not None:
+            query = query.filter(App.has_ads == self.has_ads)
+        if self.is_editors_choice is not None:
+            query = query.filter(App.is_editors_choice == self.is_editors_choice)
+        if self.released_after:
+            query = query.filter(App.released_date >= self.released_after)
+        if self.released_before:
+            query = query.filter(App.released_date <= self.released_before)
+        return query
+
+@router.get("/", response_model=PageResponseModel[List[AppList]])
 async def list_apps(
-    skip: int = Query(0, ge=0),
+    request: Request,
+    skip: int = Query(0, ge=0, description="Rows to skip, prefer cursor for deep pages"),
     limit: int = Query(100, ge=1),
-    name: Optional[str] = None,
-    category_id: Optional[int] = None,
-    developer_id: Optional[int] = None,
-    is_free: Optional[bool] = None,
-    min_rating: Optional[float] = Query(None, ge=0, le=5),
-    content_rating: Optional[str] = None,
-    has_ads: Optional[bool] = None,
-    is_editors_choice: Optional[bool] = None,
-    released_after: Optional[date] = None,
-    released_before: Optional[date] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    filters: AppFilters = Depends(),
     sort_by: Optional[str] = Query(
         None,
+        regex="^(rating|rating_count|released_date|last_updated)$",
         description="Sort field (rating, rating_count, released_date, last_updated)",
     ),
     order: Optional[str] = Query(
@@ -89,148 +165,311 @@ async def list_apps(
         regex="^(asc|desc)$",
         description="Sort order (asc, desc)",
     ),
-    db: Session = Depends(get_db)
+    total: str = Query(
+        "none",
+        regex="^(none|estimate|exact)$",
+        description="Report the rows matching the filters: none, estimate (planner estimate) or exact (cached count)",
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(
-        App.id,
-        App.name,
-        App.app_id,
-        App.rating,
-        App.rating_count,
-        App.installs,
-        App.is_free,
-        App.price,
-        App.released_date,
-        App.last_updated,
-        App.content_rating,
-        App.category_id,
-        App.developer_id
-    )
-    
-    # Apply index-optimized filters first
-    if is_free is not None:
-        query = query.filter(App.is_free == is_free)
-    if category_id is not None:
-        query = query.filter(App.category_id == category_id)
-    if min_rating:
-        query = query.filter(App.rating >= min_rating)
-        
-    # Apply remaining filters
-    if name:
-        query = query.filter(App.name.ilike(f"%{name}%"))
-    if developer_id:
-        query = query.filter(App.developer_id == developer_id)
-    if content_rating:
-        query = query.filter(App.content_rating == content_rating)
-    if has_ads is not None:
-        query = query.filter(App.has_ads == has_ads)
-    if is_editors_choice is not None:
-        query = query.filter(App.is_editors_choice == is_editors_choice)
-    if released_after:
-        query = query.filter(App.released_date >= released_after)
-    if released_before:
-        query = query.filter(App.released_date <= released_before)
-    
-    # Apply sorting
-    if sort_by:
-        sort_column = getattr(App, sort_by, None)
-        if sort_column:
-            query = query.order_by(
-                sort_column.desc() if order == "desc" else sort_column.asc()
-            )
+    """List apps as JSON, or as an Arrow IPC stream when the Accept header asks for it"""
+    query = filters.apply(select(*APP_LIST_COLUMNS))
     
-    # Print the generated SQL query
-    print("\n=== Generated SQL Query ===")
-    print(query.statement.compile(compile_kwargs={"literal_binds": True}))
-    print("========================\n")
+    # Counted over the filters only, the same for every page
+    total_rows = await count_rows(db, query, total, 'apps')
     
-    apps = query.offset(skip).limit(limit).all()
-    return {
-        'data': apps,
-        'metadata': {
-            'query_duration_ms': get_last_query_duration()
-        }
+    # Sorted with id breaking ties, so every row has a unique position for the
+    # cursor, and one extra row tells whether there is a next page
+    if cursor:
+        # Seek past the previous page instead of scanning and skipping it
+        if skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        if sort_by:
+            value, last_id = decode_cursor(cursor, sort_by, order, SORT_COLUMNS[sort_by])
+            query = keyset_page(query, getattr(App, sort_by), App.id, order, value, last_id, limit + 1)
+        else:
+            _, last_id = decode_cursor(cursor, 'id', 'asc', int)
+            query = query.filter(App.id > last_id).order_by(App.id).limit(limit + 1)
+    elif sort_by:
+        query = query.order_by(*keyset_order(getattr(App, sort_by), App.id, order)).offset(skip).limit(limit + 1)
+    else:
+        query = query.order_by(App.id).offset(skip).limit(limit + 1)
+
+    apps = (await db.execute(query)).all()
+    next_cursor = None
+    if len(apps) > limit:
+        apps = apps[:limit]
+        last = apps[-1]
+        if sort_by:
+            next_cursor = encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+        else:
+            next_cursor = encode_cursor('id', 'asc', None, last.id)
+    metadata = {
+        **get_query_metadata(),
+        'next_cursor': next_cursor,
+        'total': total_rows,
+        'total_estimated': total == 'estimate'
     }
+    if wants_arrow(request):
+        return arrow_response(query, apps, metadata)
+    return json_response(query, apps, AppList, PageMetadataModel(**metadata))
+
+# Rows fetched from the server-side cursor and written out at a time by export_apps
+EXPORT_CHUNK_ROWS = 2000
+
+def _ndjson_chunk(rows):
+    # Decimals and dates are written as strings, as in the JSON responses
+    return "".join(json.dumps(row._asdict(), default=str) + "\n" for row in rows)
+
+def _csv_chunk(rows, header=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+@router.get("/export")
+async def export_apps(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="Output format (ndjson, csv)"),
+    filters: AppFilters = Depends()
+):
+    """
+    Stream every app matching the list filters, ordered by id, as NDJSON or CSV.
+    Rows are read from a server-side cursor and sent in chunks, so memory use
+    does not grow with the export and the first rows are sent right away.
+    """
+    query = filters.apply(select(*APP_LIST_COLUMNS)).order_by(App.id)
+
+    # The connection is checked out, the query started and its first rows read
+    # before the response starts, so pool timeouts, statement timeouts and
+    # other database errors still become an error status rather than a
+    # truncated body. The body is sent after the route returns, so the session
+    # is closed by the body, or by the background task if it is never sent.
+    session = AsyncExitStack()
+    try:
+        db = await session.enter_async_context(open_session())
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        partitions = result.partitions()
+        first_rows = await anext(partitions, None)
+    except BaseException:
+        await session.aclose()
+        raise
+
+    async def generate():
+        try:
+            if format == "csv":
+                yield _csv_chunk([], list(result.keys()))
+            if first_rows:
+                yield _csv_chunk(first_rows) if format == "csv" else _ndjson_chunk(first_rows)
+            async for rows in partitions:
+                yield _csv_chunk(rows) if format == "csv" else _ndjson_chunk(rows)
+        finally:
+            await session.aclose()
+
+    if format == "csv":
+        return StreamingResponse(
+            generate(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="apps.csv"'},
+            background=BackgroundTask(session.aclose)
+        )
+    return StreamingResponse(generate(), media_type="application/x-ndjson", background=BackgroundTask(session.aclose))
 
 @router.post("/")
 async def create_app(
     app: AppCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify category and developer exist
-    category = db.query(Category).filter(Category.id == app.category_id).first()
+    category = await db.get(Category, app.category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    developer = db.query(Developer).filter(Developer.id == app.developer_id).first()
+    developer = await db.get(Developer, app.developer_id)
     if not developer:
         raise HTTPException(status_code=404, detail="Developer not found")
     
     db_app = App(**app.model_dump())
     try:
         db.add(db_app)
-        db.commit()
-        db.refresh(db_app)
+        await apply_app_changes(db, [(None, stats_values(db_app))])
+        await db.commit()
+        await db.refresh(db_app)
         return {
         'data': db_app,
-        'metadata': {
-            'query_duration_ms': get_last_query_duration()
-        }
+        'metadata': get_query_metadata()
     }
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="App with this app_id already exists"
         )
 
+async def missing_references(db: AsyncSession, records) -> Dict[int, str]:
+    """
+    Positions of the app records whose category or developer does not exist,
+    with the reason, checked for all of them in one query.
+    """
+    found = set((await db.execute(union_all(
+        select(literal('category'), Category.id)
+        .filter(Category.id.in_({record['category_id'] for record in records})),
+        select(literal('developer'), Developer.id)
+        .filter(Developer.id.in_({record['developer_id'] for record in records})),
+    ))).all())
+    errors = {}
+    for index, record in enumerate(records):
+        if ('category', record['category_id']) not in found:
+            errors[index] = "Category not found"
+        elif ('developer', record['developer_id']) not in found:
+            errors[index] = "Developer not found"
+    return errors
+
+@router.post("/bulk", response_model=ResponseModel[List[BulkItemResult]])
+async def create_apps_bulk(
+    apps: List[AppCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many apps in one transaction, with a result per app. Apps with a
+    missing category or developer or an existing app_id fail on their own,
+    the others are written with multi-row inserts.
+    """
+    records = [app.model_dump() for app in apps]
+    results = [{'index': index, 'status': 'error'} for index in range(len(records))]
+    errors = await missing_references(db, records) if records else {}
+
+    pending = {}  # app_id -> position of its record
+    for index, record in enumerate(records):
+        if index in errors:
+            results[index]['detail'] = errors[index]
+        elif record['app_id'] in pending:
+            results[index]['detail'] = "Duplicate app_id in the request"
+        else:
+            pending[record['app_id']] = index
+
+    created = {}
+    if pending:
+        # Batched into multi-row INSERTs by SQLAlchemy, existing app_ids are skipped.
+        # An insert on the table rather than the entity, as ORM bulk inserts split
+        # the batch wherever the records differ in which columns are None.
+        stmt = insert(App.__table__).on_conflict_do_nothing(index_elements=[App.app_id]).returning(App.app_id, App.id)
+        created = dict((await db.execute(stmt, [records[index] for index in pending.values()])).all())
+        await apply_app_changes(db, [(None, stats_values(records[pending[app_id]])) for app_id in created])
+        await db.run_sync(mark_written, 'apps')
+        await db.commit()
+
+    for app_id, index in pending.items():
+        if app_id in created:
+            results[index].update(status='created', id=created[app_id])
+        else:
+            results[index]['detail'] = "App with this app_id already exists"
+    return {
+        'data': results,
+        'metadata': get_query_metadata()
+    }
+
+@router.put("/bulk", response_model=ResponseModel[List[BulkItemResult]])
+async def update_apps_bulk(
+    apps: List[AppCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Update many apps, found by their app_id, in one transaction, with a result
+    per app. Apps that do not exist or have a missing category or developer
+    fail on their own.
+    """
+    records = [app.model_dump() for app in apps]
+    results = [{'index': index, 'status': 'error'} for index in range(len(records))]
+    errors = await missing_references(db, records) if records else {}
+
+    # Current rows, locked in id order so concurrent bulk updates cannot deadlock
+    existing = {}
+    if records:
+        existing = {row.app_id: row for row in (await db.execute(
+            select(App.id, App.app_id, *(getattr(App, field) for field in STATS_FIELDS))
+            .filter(App.app_id.in_({record['app_id'] for record in records}))
+            .order_by(App.id)
+            .with_for_update()
+        )).all()}
+
+    pending = {}  # app_id -> position of its record
+    for index, record in enumerate(records):
+        if index in errors:
+            results[index]['detail'] = errors[index]
+        elif record['app_id'] not in existing:
+            results[index]['detail'] = "App not found"
+        elif record['app_id'] in pending:
+            results[index]['detail'] = "Duplicate app_id in the request"
+        else:
+            pending[record['app_id']] = index
+
+    if pending:
+        # UPDATE by primary key, sent to the server as one batch
+        await db.execute(update(App), [
+            {**records[index], 'id': existing[app_id].id} for app_id, index in pending.items()
+        ])
+        await apply_app_changes(db, [
+            (stats_values(existing[app_id]), stats_values(records[index])) for app_id, index in pending.items()
+        ])
+        await db.run_sync(mark_written, 'apps')
+        await db.commit()
+
+    for app_id, index in pending.items():
+        results[index].update(status='updated', id=existing[app_id].id)
+    return {
+        'data': results,
+        'metadata': get_query_metadata()
+    }
+
 @router.get("/{app_id}")
 async def get_app(
     app_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    app = db.query(App).filter(App.id == app_id).first()
+    app = await db.get(App, app_id)
     if not app:
         raise HTTPException(status_code=404, detail="App not found")
     return {
         'data': app,
-        'metadata': {
-            'query_duration_ms': get_last_query_duration()
-        }
+        'metadata': get_query_metadata()
     }
 
 @router.put("/{app_id}")
 async def update_app(
     app_id: int,
     app: AppCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify category and developer exist
-    category = db.query(Category).filter(Category.id == app.category_id).first()
+    category = await db.get(Category, app.category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    developer = db.query(Developer).filter(Developer.id == app.developer_id).first()
+    developer = await db.get(Developer, app.developer_id)
     if not developer:
         raise HTTPException(status_code=404, detail="Developer not found")
     
-    db_app = db.query(App).filter(App.id == app_id).first()
+    # Locked until commit, so concurrent writes of the app apply their stats
+    # deltas one after the other, each from the row the previous one left
+    db_app = await db.get(App, app_id, with_for_update=True)
     if not db_app:
         raise HTTPException(status_code=404, detail="App not found")
     
     try:
+        old_values = stats_values(db_app)
         for key, value in app.model_dump().items():
             setattr(db_app, key, value)
-        db.commit()
-        db.refresh(db_app)
+        await apply_app_changes(db, [(old_values, stats_values(db_app))])
+        await db.commit()
+        await db.refresh(db_app)
         return {
             'data': db_app,
-            'metadata': {
-                'query_duration_ms': get_last_query_duration()
-            }
+            'metadata': get_query_metadata()
         }
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="App with this app_id already exists"
@@ -239,55 +478,87 @@ async def update_app(
 @router.delete("/{app_id}", status_code=204)
 async def delete_app(
     app_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    app = db.query(App).filter(App.id == app_id).first()
+    # Locked until commit, a concurrent delete finds no row instead of
+    # subtracting the app from the stats a second time
+    app = await db.get(App, app_id, with_for_update=True)
     if not app:
         raise HTTPException(status_code=404, detail="App not found")
     
-    db.delete(app)
-    db.commit()
+    await db.delete(app)
+    await apply_app_changes(db, [(stats_values(app), None)])
+    await db.commit()
 
-@router.get("/search/")
+@router.get("/search/", response_model=ResponseModel[List[AppSearchResult]])
 async def search_apps(
+    request: Request,
     q: str = Query(..., min_length=3, description="Search query"),
+    mode: str = Query(
+        "match",
+        regex="^(match|prefix)$",
+        description="match: words and substrings of q; prefix: words and names starting with q, for type-ahead",
+    ),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_with_timeout(DB_SEARCH_STATEMENT_TIMEOUT_MS))
 ):
     """
-    Search apps by name, category name, or developer name
+    Search apps by name, package name, category name, or developer name,
+    most relevant first. Returned as an Arrow IPC stream when the Accept
+    header asks for it.
     """
+    # Wildcards typed by the user are matched literally
+    escaped = re.sub(r"([\\%_])", r"\\\1", q)
+    pattern = f"{escaped}%" if mode == "prefix" else f"%{escaped}%"
+    tsquery = search_tsquery(q, mode)
+
+    # Each source is searched on its own table and index: GIN on search_vector
+    # and trigram GIN for the names, then apps of matched categories and
+    # developers through their id indexes. The work grows with the matches,
+    # not with the tables.
+    name_match = App.name.ilike(pattern, escape="\\")
+    if tsquery is not None:
+        name_match = or_(name_match, App.search_vector.op('@@')(tsquery))
+    # Full text relevance, raised for names equal to or starting with q
+    name_rank = (
+        (func.ts_rank(App.search_vector, tsquery) if tsquery is not None else literal(0.0))
+        + case((func.lower(App.name) == q.lower(), 1.0), else_=0.0)
+        + case((App.name.ilike(f"{escaped}%", escape="\\"), 0.5), else_=0.0)
+    )
+    candidates = union_all(
+        select(App.id, literal('name').label('matched_field'), literal(1).label('priority'),
+               name_rank.cast(Float).label('rank'))
+        .filter(name_match),
+        select(App.id, literal('developer'), literal(2), literal(0.0, Float))
+        .join(Developer, Developer.id == App.developer_id)
+        .filter(Developer.name.ilike(pattern, escape="\\")),
+        select(App.id, literal('category'), literal(3), literal(0.0, Float))
+        .join(Category, Category.id == App.category_id)
+        .filter(Category.name.ilike(pattern, escape="\\")),
+    ).subquery()
+
+    # An app found by several sources keeps its best match: name before
+    # developer before category, then the highest rank
+    best = (
+        select(candidates)
+        .distinct(candidates.c.id)
+        .order_by(candidates.c.id, candidates.c.priority, candidates.c.rank.desc())
+        .subquery()
+    )
+
     query = (
-        db.query(
-            App.id,
-            App.name,
-            App.app_id,
-            App.rating,
-            App.rating_count,
-            App.installs,
-            App.is_free,
-            App.price,
-            App.released_date,
-            App.last_updated,
-            App.content_rating,
-            App.category_id,
-            App.developer_id
-        )
-        .join(Category)
-        .join(Developer)
-        .filter(
-            or_(
-                App.name.ilike(f"%{q}%"),
-                Category.name.ilike(f"%{q}%"),
-                Developer.name.ilike(f"%{q}%")
-            )
+        select(
+            *APP_LIST_COLUMNS,
+            best.c.rank,
+            best.c.matched_field
         )
+        .join(best, best.c.id == App.id)
+        # Name matches first, by relevance, then developer and category
+        # matches. id breaks ties, so pages are stable
+        .order_by(best.c.priority, best.c.rank.desc(), App.id)
     )
-    apps = query.offset(skip).limit(limit).all()
-    return {
-        'data': apps,
-        'metadata': {
-            'query_duration_ms': get_last_query_duration()
-        }
-    }
+    apps = (await db.execute(query.offset(skip).limit(limit))).all()
+    if wants_arrow(request):
+        return arrow_response(query, apps, get_query_metadata())
+    return json_response(query, apps, AppSearchResult, MetadataModel(**get_query_metadata()))
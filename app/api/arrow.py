@@ -0,0 +1,57 @@
+import json
+
+import pyarrow as pa
+from fastapi import Request, Response
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Float, Integer, Numeric, SmallInteger, String
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+def wants_arrow(request: Request) -> bool:
+    """Whether the client asked for an Arrow IPC stream instead of JSON."""
+    return ARROW_STREAM in request.headers.get("accept", "")
+
+def arrow_type(column_type) -> pa.DataType:
+    """Arrow type of a SQLAlchemy column type, None to let Arrow infer it."""
+    # Subclasses first: BigInteger is an Integer and Float is a Numeric
+    if isinstance(column_type, BigInteger):
+        return pa.int64()
+    if isinstance(column_type, SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Numeric):
+        if column_type.precision is None:
+            return pa.float64()
+        return pa.decimal128(column_type.precision, column_type.scale or 0)
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, String):
+        return pa.string()
+    return None
+
+def arrow_response(query, rows, metadata: dict) -> Response:
+    """
+    Rows of a select as one Arrow record batch. The result tuples are
+    transposed into columns once and each column is converted in a single
+    call, typed from the columns of the query. The response metadata travels
+    as JSON in the schema metadata.
+    """
+    columns = query.selected_columns
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    arrays = [pa.array(column_values, type=arrow_type(column.type)) for column, column_values in zip(columns, values)]
+    schema = pa.schema(
+        [pa.field(column.name, array.type) for column, array in zip(columns, arrays)],
+        metadata={"metadata": json.dumps(metadata, default=str)}
+    )
+    batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, Float
+from sqlalchemy import func, Float, select
 from typing import List, Optional
 
-from ..database import get_db, get_last_query_duration
-from ..models import Category, App
+from ..cache import cached
+from ..database import get_db, get_lazy_db, get_query_metadata
+from ..models import Category, CategoryStats, CategoryYearStats
 from ..schemas import ResponseModel
-from ..schemas import CategoryCreate, Category as CategorySchema, CategoryWithApps
+from ..schemas import CategoryAnalytics, CategoryCreate, Category as CategorySchema, CategoryWithApps
+from .totals import count_rows
 
 router = APIRouter(
     prefix="/categories",
@@ -15,47 +18,108 @@ router = APIRouter(
 )
 
 @router.get("/{category_id}/rating")
+@cached("apps")
 async def get_category_rating(
     category_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_lazy_db)
 ):
     """Get the average rating for a specific category."""
-    result = (
-        db.query(func.avg(App.rating).cast(Float))
-        .filter(App.category_id == category_id)
-        .scalar()
+    # The rating sum and count are kept in category_stats by the write handlers and the importer
+    result = await db.scalar(
+        select((CategoryStats.rating_sum / func.nullif(CategoryStats.rated_apps, 0)).cast(Float))
+        .filter(CategoryStats.category_id == category_id)
     )
     
-    return {'data' : {"average_rating": round(result, 2) if result else 0}, 'metadata': {'query_duration_ms': get_last_query_duration()}}
+    return {'data' : {"average_rating": round(result, 2) if result else 0}, 'metadata': get_query_metadata()}
+
+@router.get("/analytics", response_model=ResponseModel[List[CategoryAnalytics]])
+@cached("apps", "categories")
+async def get_category_analytics(
+    category_id: Optional[int] = Query(None, description="Only this category, all categories by default"),
+    db: AsyncSession = Depends(get_lazy_db)
+):
+    """
+    Get the app count, average rating, free and paid counts and yearly
+    released and updated counts of one or all categories, in one statement
+    over the category_stats summaries.
+    """
+    query = (
+        select(
+            Category.id, Category.name,
+            CategoryStats.app_count, CategoryStats.free_count, CategoryStats.paid_count,
+            (CategoryStats.rating_sum / func.nullif(CategoryStats.rated_apps, 0)).cast(Float).label('average_rating'),
+            CategoryYearStats.year, CategoryYearStats.released_count, CategoryYearStats.updated_count
+        )
+        .outerjoin(CategoryStats, CategoryStats.category_id == Category.id)
+        .outerjoin(CategoryYearStats, CategoryYearStats.category_id == Category.id)
+        .order_by(Category.id, CategoryYearStats.year)
+    )
+    if category_id is not None:
+        query = query.filter(Category.id == category_id)
+
+    # One row per category and year, folded into one entry per category
+    analytics = {}
+    for row in (await db.execute(query)).all():
+        entry = analytics.get(row.id)
+        if entry is None:
+            entry = analytics[row.id] = {
+                'id': row.id,
+                'name': row.name,
+                'app_count': row.app_count or 0,
+                'average_rating': round(row.average_rating, 2) if row.average_rating else 0,
+                'free_count': row.free_count or 0,
+                'paid_count': row.paid_count or 0,
+                'released': {},
+                'updated': {},
+            }
+        if row.released_count:
+            entry['released'][row.year] = row.released_count
+        if row.updated_count:
+            entry['updated'][row.year] = row.updated_count
+
+    if category_id is not None and not analytics:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return {'data': list(analytics.values()), 'metadata': get_query_metadata()}
 
 @router.get("/", response_model=ResponseModel[List[CategorySchema]])
+@cached("categories")
 async def list_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
     name: Optional[str] = None,
-    db: Session = Depends(get_db)
+    total: str = Query(
+        "none",
+        regex="^(none|estimate|exact)$",
+        description="Report the rows matching the filters: none, estimate (planner estimate) or exact (cached count)",
+    ),
+    db: AsyncSession = Depends(get_lazy_db)
 ):
-    query = db.query(Category)
+    query = select(Category)
     if name:
         query = query.filter(Category.name.ilike(f"%{name}%"))
-    return { 'data': query.offset(skip).limit(limit).all(), 'metadata': {'query_duration_ms': get_last_query_duration()} }
+    total_rows = await count_rows(db, query, total, 'categories')
+    categories = (await db.scalars(query.offset(skip).limit(limit))).all()
+    return {
+        'data': categories,
+        'metadata': {**get_query_metadata(), 'total': total_rows, 'total_estimated': total == 'estimate'}
+    }
 
 @router.post("/", response_model=ResponseModel[CategorySchema])
 async def create_category(
     category: CategoryCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     db_category = Category(**category.model_dump())
     try:
         db.add(db_category)
-        db.commit()
-        db.refresh(db_category)
+        await db.commit()
+        await db.refresh(db_category)
         return {
             'data': db_category,
-            'metadata': {'query_duration_ms': get_last_query_duration() }
+            'metadata': get_query_metadata()
         }
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Category with this name already exists"
@@ -64,31 +128,37 @@ async def create_category(
 @router.get("/{category_id}", response_model=ResponseModel[CategoryWithApps])
 async def get_category(
     category_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    # Relationships cannot be lazy loaded on an AsyncSession, load the apps up front
+    category = await db.scalar(
+        select(Category).options(selectinload(Category.apps)).filter(Category.id == category_id)
+    )
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    return {
+        'data': category,
+        'metadata': get_query_metadata()
+    }
 
 @router.put("/{category_id}", response_model=CategorySchema)
 async def update_category(
     category_id: int,
     category: CategoryCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     try:
         for key, value in category.model_dump().items():
             setattr(db_category, key, value)
-        db.commit()
-        db.refresh(db_category)
+        await db.commit()
+        await db.refresh(db_category)
         return db_category
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Category with this name already exists"
@@ -97,17 +167,17 @@ async def update_category(
 @router.delete("/{category_id}", status_code=204)
 async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     try:
-        db.delete(category)
-        db.commit()
+        await db.delete(category)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Cannot delete category as it has associated apps"
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from typing import List, Optional
 
-from ..database import get_db, get_last_query_duration
+from ..cache import mark_written
+from ..config import BULK_MAX_ITEMS
+from ..database import get_db, get_query_metadata
 from ..models import Developer
-from ..schemas import ResponseModel
+from ..schemas import BulkItemResult, MetadataModel, ResponseModel
 from ..schemas import DeveloperCreate, Developer as DeveloperSchema, DeveloperWithApps
+from .arrow import arrow_response, wants_arrow
+from .fast_json import json_response
+from .totals import count_rows
 
 router = APIRouter(
     prefix="/developers",
@@ -15,47 +23,106 @@ router = APIRouter(
 
 @router.get("/", response_model=ResponseModel[List[DeveloperSchema]])
 async def list_developers(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, ge=1),
     name: Optional[str] = None,
     email: Optional[str] = None,
-    db: Session = Depends(get_db)
+    total: str = Query(
+        "none",
+        regex="^(none|estimate|exact)$",
+        description="Report the rows matching the filters: none, estimate (planner estimate) or exact (cached count)",
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Developer)
+    """List developers as JSON, or as an Arrow IPC stream when the Accept header asks for it"""
+    # Plain rows rather than entities, so they convert to Arrow column by column
+    query = select(*Developer.__table__.columns)
     if name:
         query = query.filter(Developer.name.ilike(f"%{name}%"))
     if email:
         query = query.filter(Developer.email.ilike(f"%{email}%"))
+    total_rows = await count_rows(db, query, total, 'developers')
 
-    query_result = query.offset(skip).limit(limit).all()
-
-    return { 'data': query_result, 'metadata': { 'query_duration_ms': get_last_query_duration() }}
+    query_result = (await db.execute(query.offset(skip).limit(limit))).all()
+    metadata = {**get_query_metadata(), 'total': total_rows, 'total_estimated': total == 'estimate'}
+    if wants_arrow(request):
+        return arrow_response(query, query_result, metadata)
+    return json_response(query, query_result, DeveloperSchema, MetadataModel(**metadata))
     # return { 'data': , 'metadata': { 'query_duration_ms': get_last_query_duration()} }
 
 @router.post("/", response_model=ResponseModel[DeveloperSchema])
 async def create_developer(
     developer: DeveloperCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     db_developer = Developer(**developer.model_dump())
     try:
         db.add(db_developer)
-        db.commit()
-        db.refresh(db_developer)
-        return { 'data': db_developer, 'metadata': { 'query_duration_ms': get_last_query_duration() }}
+        await db.commit()
+        await db.refresh(db_developer)
+        return { 'data': db_developer, 'metadata': get_query_metadata()}
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Developer with this name and email combination already exists"
         )
 
+@router.post("/bulk", response_model=ResponseModel[List[BulkItemResult]])
+async def create_developers_bulk(
+    developers: List[DeveloperCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many developers in one transaction, with a result per developer.
+    Existing name and email combinations fail on their own, the others are
+    written with multi-row inserts.
+    """
+    records = [developer.model_dump() for developer in developers]
+    results = [{'index': index, 'status': 'error'} for index in range(len(records))]
+
+    pending = {}  # (name, email) -> position of its record
+    for index, record in enumerate(records):
+        key = (record['name'], record['email'])
+        if key in pending:
+            results[index]['detail'] = "Duplicate name and email combination in the request"
+        else:
+            pending[key] = index
+
+    created = {}
+    if pending:
+        # Batched into multi-row INSERTs by SQLAlchemy, existing developers are skipped.
+        # On the table rather than the entity, so records without an email stay in the batch.
+        stmt = (
+            insert(Developer.__table__)
+            .on_conflict_do_nothing(index_elements=[Developer.name, Developer.email])
+            .returning(Developer.name, Developer.email, Developer.id)
+        )
+        rows = (await db.execute(stmt, [records[index] for index in pending.values()])).all()
+        created = {(name, email): developer_id for name, email, developer_id in rows}
+        await db.run_sync(mark_written, 'developers')
+        await db.commit()
+
+    for key, index in pending.items():
+        if key in created:
+            results[index].update(status='created', id=created[key])
+        else:
+            results[index]['detail'] = "Developer with this name and email combination already exists"
+    return {
+        'data': results,
+        'metadata': get_query_metadata()
+    }
+
 @router.get("/{developer_id}", response_model=DeveloperWithApps)
 async def get_developer(
     developer_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    developer = db.query(Developer).filter(Developer.id == developer_id).first()
+    # Relationships cannot be lazy loaded on an AsyncSession, load the apps up front
+    developer = await db.scalar(
+        select(Developer).options(selectinload(Developer.apps)).filter(Developer.id == developer_id)
+    )
     if not developer:
         raise HTTPException(status_code=404, detail="Developer not found")
     return developer
@@ -64,20 +131,20 @@ async def get_developer(
 async def update_developer(
     developer_id: int,
     developer: DeveloperCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_developer = db.query(Developer).filter(Developer.id == developer_id).first()
+    db_developer = await db.get(Developer, developer_id)
     if not db_developer:
         raise HTTPException(status_code=404, detail="Developer not found")
     
     try:
         for key, value in developer.model_dump().items():
             setattr(db_developer, key, value)
-        db.commit()
-        db.refresh(db_developer)
+        await db.commit()
+        await db.refresh(db_developer)
         return db_developer
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Developer with this name and email combination already exists"
@@ -86,17 +153,17 @@ async def update_developer(
 @router.delete("/{developer_id}", status_code=204)
 async def delete_developer(
     developer_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    developer = db.query(Developer).filter(Developer.id == developer_id).first()
+    developer = await db.get(Developer, developer_id)
     if not developer:
         raise HTTPException(status_code=404, detail="Developer not found")
     
     try:
-        db.delete(developer)
-        db.commit()
+        await db.delete(developer)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Cannot delete developer as they have associated apps"
@@ -0,0 +1,39 @@
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+@lru_cache(maxsize=64)
+def row_layout(schema: type, columns: tuple):
+    """
+    Field names of a response schema and a getter picking them out of a row,
+    in the order of the schema, for rows with the given column names.
+    """
+    fields = tuple(schema.model_fields)
+    getter = itemgetter(*(columns.index(field) for field in fields))
+    if len(fields) == 1:
+        return fields, lambda row: (getter(row),)
+    return fields, getter
+
+def _default(value):
+    # Decimal is encoded as a string, as pydantic does
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+def json_response(query, rows, schema: type, metadata: BaseModel) -> Response:
+    """
+    Rows of a select encoded straight to JSON with orjson, skipping the
+    per-row validation of the response model. The output matches what the
+    response model would give for the same rows, and the endpoint keeps its
+    response_model for the OpenAPI schema.
+    """
+    fields, getter = row_layout(schema, tuple(column.name for column in query.selected_columns))
+    data = [dict(zip(fields, getter(row))) for row in rows]
+    return Response(
+        content=orjson.dumps({'data': data, 'metadata': metadata.model_dump()}, default=_default),
+        media_type="application/json"
+    )
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import literal, select, tuple_, union_all
+
+def encode_cursor(sort_by: str, order: str, value, id: int) -> str:
+    """Encode the sort key and id of the last row of a page as an opaque cursor."""
+    if isinstance(value, (date, Decimal)):
+        value = value.isoformat() if isinstance(value, date) else str(value)
+    payload = json.dumps({'s': sort_by, 'o': order, 'v': value, 'id': id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort_by: str, order: str, value_type):
+    """
+    Decode a cursor made by encode_cursor into its (value, id).
+    Raises a 400 error if the cursor is malformed or was made for another sort.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if payload['s'] != sort_by or payload['o'] != order:
+            raise ValueError("cursor was made for a different sort")
+        value = payload['v']
+        if value is not None:
+            value = value_type.fromisoformat(value) if value_type is date else value_type(value)
+        return value, int(payload['id'])
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+def keyset_order(sort_column, id_column, order: str):
+    """
+    ORDER BY clauses for keyset pagination, NULLs last ascending and first
+    descending. That is PostgreSQL's default, so a (sort_column, id) index
+    still gives the order, and the NULLs are placed the same on any backend.
+    """
+    if order == "desc":
+        return sort_column.desc().nulls_first(), id_column.desc()
+    return sort_column.asc().nulls_last(), id_column.asc()
+
+def keyset_page(query, sort_column, id_column, order: str, value, id: int, limit: int):
+    """
+    The first limit rows of query after (value, id) in keyset_order.
+
+    Each condition is one PostgreSQL can seek to in a (sort_column, id) index.
+    A page that can cross between the non-NULL keys and the NULLs reads both
+    sides as ordered, limited branches of a UNION ALL, as an OR of the two
+    conditions would be filtered over a scan instead. A NULL value in the
+    cursor means the previous page ended among the NULLs.
+    """
+    if order == "desc":
+        # NULLs come first, then non-NULL values in descending order
+        if value is not None:
+            return (query.filter(tuple_(sort_column, id_column) < tuple_(value, id))
+                    .order_by(*keyset_order(sort_column, id_column, order)).limit(limit))
+        branches = (
+            query.filter(sort_column.is_(None), id_column < id).order_by(id_column.desc()),
+            query.filter(sort_column.isnot(None)).order_by(*keyset_order(sort_column, id_column, order)),
+        )
+    else:
+        # Non-NULL values in ascending order, then NULLs
+        if value is None:
+            return (query.filter(sort_column.is_(None), id_column > id)
+                    .order_by(id_column.asc()).limit(limit))
+        branches = (
+            query.filter(tuple_(sort_column, id_column) > tuple_(value, id))
+            .order_by(*keyset_order(sort_column, id_column, order)),
+            query.filter(sort_column.is_(None)).order_by(id_column.asc()),
+        )
+
+    # Each branch is a subquery of its own, its ORDER BY and LIMIT stay with it
+    page = union_all(*(
+        select(branch.add_columns(literal(phase).label('keyset_phase')).limit(limit).subquery())
+        for phase, branch in enumerate(branches)
+    )).subquery()
+    return (
+        select(*(page.c[column.name] for column in query.selected_columns))
+        .order_by(page.c.keyset_phase, *keyset_order(page.c[sort_column.name], page.c[id_column.name], order))
+        .limit(limit)
+    )
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache import response_cache
+
+def _driver_statement(db: AsyncSession, query):
+    """SQL and positional parameters of a query, as the driver receives them."""
+    compiled = query.compile(dialect=db.bind.dialect)
+    return str(compiled), tuple(compiled.params[name] for name in compiled.positiontup or ())
+
+async def estimate_rows(db: AsyncSession, query, table: str) -> int:
+    """
+    Planner estimate of the rows of a list query, without running it. An
+    unfiltered table is counted from pg_class.reltuples, a filtered query from
+    the row estimate of its plan.
+    """
+    if query.whereclause is None:
+        reltuples = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": table}
+        )
+        # -1 until the table is first vacuumed or analyzed
+        if reltuples is not None and reltuples >= 0:
+            return reltuples
+    sql, parameters = _driver_statement(db, query)
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", parameters)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def exact_rows(db: AsyncSession, query, table: str) -> int:
+    """
+    Exact rows of a list query. Counts are kept in the response cache per
+    statement and parameters, so every filter combination is counted once
+    until the table is written to.
+    """
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    sql, parameters = _driver_statement(db, count_query)
+    key = ("count", sql, parameters)
+    if response_cache.enabled:
+        total = response_cache.get(key)
+        if total is not None:
+            return total
+    total = await db.scalar(count_query)
+    if response_cache.enabled:
+        response_cache.set(key, total, [table])
+    return total
+
+async def count_rows(db: AsyncSession, query, mode: str, table: str) -> Optional[int]:
+    """Total rows of a list query for its total mode: none, estimate or exact."""
+    if mode == "estimate":
+        return await estimate_rows(db, query, table)
+    if mode == "exact":
+        return await exact_rows(db, query, table)
+    return None
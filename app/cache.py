@@ -0,0 +1,161 @@
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import DATABASE_LISTEN_URL, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE
+from .database import _SyncSession, get_query_metadata
+
+# Channel the names of changed tables are sent on, by the API and by import_data.py
+CACHE_CHANNEL = "api_cache_invalidate"
+
+class ResponseCache:
+    """
+    In-process cache of route results, with a TTL and LRU eviction. Each entry
+    is tagged with the tables it was computed from, so writes to a table drop
+    only the entries that read it. Another backend only needs the same
+    get, set, invalidate and clear methods.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.enabled = ttl > 0 and maxsize > 0
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key, value, tables):
+        self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *tables):
+        tables = set(tables)
+        for key in [key for key, entry in self._entries.items() if entry[1] & tables]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+response_cache = ResponseCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE)
+
+def cached(*tables):
+    """
+    Cache the result of a GET route, keyed on the route and its parameters,
+    until the TTL passes or one of the tables it reads is written to.
+    The route must return a dict with 'data' and 'metadata', and should use
+    get_lazy_db so that hits do not take a connection.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(**kwargs):
+            if not response_cache.enabled:
+                return await func(**kwargs)
+            # FastAPI passes every parameter by name, the session is not part of the key
+            key = (func.__module__, func.__qualname__, tuple(sorted(
+                (name, value) for name, value in kwargs.items() if not isinstance(value, AsyncSession)
+            )))
+            result = response_cache.get(key)
+            if result is not None:
+                # The metadata describes this request, which ran no statements
+                return {**result, "metadata": {**result["metadata"], **get_query_metadata(), "cached": True}}
+            result = await func(**kwargs)
+            result = {**result, "metadata": {**result["metadata"], "cached": False}}
+            response_cache.set(key, result, tables)
+            return result
+        return wrapper
+    return decorator
+
+# Tables written by a session are collected on flush. The notification is sent
+# in the same transaction, so PostgreSQL delivers it only if the write commits.
+def mark_written(session, *tables):
+    """
+    Record writes to tables in the transaction of a sync session, once per
+    table. Flushed objects are recorded by notify_written_tables, statements
+    run with execute, such as bulk inserts, are recorded through
+    AsyncSession.run_sync(mark_written, table).
+    """
+    written = session.info.setdefault("written_tables", set())
+    for table in tables:
+        if table not in written:
+            written.add(table)
+            session.connection().exec_driver_sql("SELECT pg_notify($1, $2)", (CACHE_CHANNEL, table))
+
+@event.listens_for(_SyncSession, "after_flush")
+def notify_written_tables(session, flush_context):
+    mark_written(session, *(obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)))
+
+# The notification reaches this worker too, but only after the response, so
+# the entries are also dropped here for a client reading its own write
+@event.listens_for(_SyncSession, "after_commit")
+def invalidate_written_tables(session):
+    written = session.info.pop("written_tables", None)
+    if written:
+        response_cache.invalidate(*written)
+
+@event.listens_for(_SyncSession, "after_rollback")
+def forget_written_tables(session):
+    session.info.pop("written_tables", None)
+
+def _on_notification(connection, pid, channel, table):
+    response_cache.invalidate(table)
+
+def _on_listener_lost(connection):
+    # Writes of other workers and the importer would go unnoticed
+    response_cache.clear()
+    response_cache.enabled = False
+    print("Cache invalidation listener lost its connection, response cache disabled")
+
+async def start_invalidation_listener():
+    """
+    LISTEN for changed tables on a connection of its own, outside the pool,
+    to DATABASE_LISTEN_URL. Without it other workers' writes would go
+    unnoticed, so the cache is off when there is no such URL or it cannot
+    connect. Returns the connection, or None.
+    """
+    if not response_cache.enabled:
+        return None
+    if DATABASE_LISTEN_URL is None:
+        # LISTEN through PgBouncer succeeds, but notifications never arrive
+        response_cache.enabled = False
+        print("DB_PGBOUNCER is set without DATABASE_LISTEN_URL, response cache disabled")
+        return None
+    url = make_url(DATABASE_LISTEN_URL).set(drivername="postgresql")
+    try:
+        connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+        await connection.add_listener(CACHE_CHANNEL, _on_notification)
+    except (OSError, asyncpg.PostgresError) as e:
+        response_cache.enabled = False
+        print(f"Cannot listen for cache invalidations, response cache disabled: {e}")
+        return None
+    connection.add_termination_listener(_on_listener_lost)
+    print(f"Listening for cache invalidations on {url.render_as_string()}")
+    return connection
+
+async def stop_invalidation_listener(connection):
+    """Close the connection of start_invalidation_listener on shutdown."""
+    connection.remove_termination_listener(_on_listener_lost)
+    await connection.close()
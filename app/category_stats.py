@@ -0,0 +1,81 @@
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import CategoryStats, CategoryYearStats
+
+# App fields the category statistics are computed from
+STATS_FIELDS = ('category_id', 'rating', 'is_free', 'released_date', 'last_updated')
+
+# Counters of category_stats and category_year_stats
+STATS_COLUMNS = ('app_count', 'rated_apps', 'rating_sum', 'free_count', 'paid_count')
+YEAR_STATS_COLUMNS = ('released_count', 'updated_count')
+
+def stats_values(app):
+    """The fields of an app, model or dict, that category_stats depends on."""
+    if isinstance(app, dict):
+        values = {field: app.get(field) for field in STATS_FIELDS}
+    else:
+        values = {field: getattr(app, field) for field in STATS_FIELDS}
+    # Ratings are stored as NUMERIC(2, 1), the sum must match what PostgreSQL keeps
+    if values['rating'] is not None:
+        values['rating'] = Decimal(values['rating']).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+    return values
+
+def _add_app(totals, years, values, sign):
+    category_id = values['category_id']
+    if category_id is None:
+        return
+    total = totals[category_id]
+    total['app_count'] += sign
+    if values['rating'] is not None:
+        total['rated_apps'] += sign
+        total['rating_sum'] += sign * values['rating']
+    if values['is_free'] is not None:
+        total['free_count' if values['is_free'] else 'paid_count'] += sign
+    if values['released_date'] is not None:
+        years[category_id, values['released_date'].year]['released_count'] += sign
+    if values['last_updated'] is not None:
+        years[category_id, values['last_updated'].year]['updated_count'] += sign
+
+async def apply_app_changes(db: AsyncSession, changes):
+    """
+    Update category_stats and category_year_stats for changed apps, in the
+    transaction of the change. changes holds (old, new) pairs of stats_values,
+    old is None for a created app and new is None for a deleted one.
+    Deltas are added in place, so concurrent writers do not overwrite each other,
+    with one statement per table however many apps changed.
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+    years = defaultdict(lambda: defaultdict(int))
+    for old, new in changes:
+        if old is not None:
+            _add_app(totals, years, old, -1)
+        if new is not None:
+            _add_app(totals, years, new, 1)
+
+    # One multi-row upsert per table, in key order so concurrent writers lock
+    # the rows in the same order
+    stats_rows = [
+        {'category_id': category_id, **{column: delta[column] for column in STATS_COLUMNS}}
+        for category_id, delta in sorted(totals.items()) if any(delta.values())
+    ]
+    if stats_rows:
+        stmt = insert(CategoryStats).values(stats_rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[CategoryStats.category_id],
+            set_={column: getattr(CategoryStats, column) + stmt.excluded[column] for column in STATS_COLUMNS}
+        ))
+
+    year_rows = [
+        {'category_id': category_id, 'year': year, **{column: delta[column] for column in YEAR_STATS_COLUMNS}}
+        for (category_id, year), delta in sorted(years.items()) if any(delta.values())
+    ]
+    if year_rows:
+        stmt = insert(CategoryYearStats).values(year_rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[CategoryYearStats.category_id, CategoryYearStats.year],
+            set_={column: getattr(CategoryYearStats, column) + stmt.excluded[column] for column in YEAR_STATS_COLUMNS}
+        ))
@@ -1,12 +1,28 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from .database import get_db, engine
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+from .config import DB_POOL_TIMEOUT, QUERY_LOG_SAMPLE_RATE, SLOW_QUERY_MS
+from .database import get_db, get_pool_stats, engine, query_log
+from .cache import response_cache, start_invalidation_listener, stop_invalidation_listener
+from .metrics import track_request
+from .query_plans import slow_queries
 from . import models
 from .api import api_router
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = await start_invalidation_listener()
+    yield
+    if listener is not None:
+        await stop_invalidation_listener(listener)
+
 app = FastAPI(
+    lifespan=lifespan,
     title="PlayStore API",
     description="API for managing PlayStore applications data.",
     version="1.0.0",
@@ -29,9 +45,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query stats, Server-Timing header and Prometheus metrics
+app.middleware("http")(track_request)
+
 # Include API router with prefix
 app.include_router(api_router, prefix="/api/v1")
 
+# Pool exhaustion and statement timeouts are overload, not server bugs
+@app.exception_handler(exc.TimeoutError)
+async def pool_timeout_handler(request: Request, error: exc.TimeoutError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "No database connection available, try again later"},
+        headers={"Retry-After": str(max(1, int(DB_POOL_TIMEOUT)))}
+    )
+
+@app.exception_handler(exc.DBAPIError)
+async def statement_timeout_handler(request: Request, error: exc.DBAPIError):
+    # 57014 is query_canceled, raised when statement_timeout expires
+    if getattr(error.orig, "sqlstate", None) != "57014":
+        raise error
+    return JSONResponse(status_code=504, content={"detail": "Database query timed out"})
+
 @app.get("/")
 async def root():
     return {
@@ -44,13 +79,15 @@ from sqlalchemy import text
 
 # Health check endpoint
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     try:
         # Try to make a simple query to verify database connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": get_pool_stats(),
+            "cache": response_cache.stats(),
             "version": "1.0.0"
         }
     except Exception as e:
@@ -59,6 +96,53 @@ async def health_check(db: Session = Depends(get_db)):
             "database": str(e)
         }
 
+# Prometheus metrics of this worker process
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# Recent statements of sampled requests, newest first
+@app.get("/debug/queries", include_in_schema=False)
+async def debug_queries(
+    route: str = Query(None, description="Only statements of this route template"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    entries = [entry for entry in reversed(query_log) if route is None or entry["route"] == route]
+    return {
+        "data": entries[:limit],
+        "metadata": {
+            "sample_rate": QUERY_LOG_SAMPLE_RATE,
+            "capacity": query_log.maxlen,
+            "logged": len(query_log)
+        }
+    }
+
+# Slow statements with their captured plans, newest first
+@app.get("/debug/slow-queries", include_in_schema=False)
+async def list_slow_queries(
+    route: str = Query(None, description="Only statements of this route template"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    entries = [
+        {key: value for key, value in entry.items() if key != "plan"}
+        for entry in reversed(slow_queries) if route is None or entry["route"] == route
+    ]
+    return {
+        "data": entries[:limit],
+        "metadata": {
+            "threshold_ms": SLOW_QUERY_MS,
+            "capacity": slow_queries.maxlen,
+            "captured": len(slow_queries)
+        }
+    }
+
+@app.get("/debug/slow-queries/{query_id}", include_in_schema=False)
+async def get_slow_query(query_id: int):
+    for entry in slow_queries:
+        if entry["id"] == query_id:
+            return {"data": entry}
+    raise HTTPException(status_code=404, detail="Slow query not found")
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
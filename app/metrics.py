@@ -0,0 +1,108 @@
+import random
+import time
+from datetime import datetime, timezone
+
+from fastapi import Request
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .config import QUERY_LOG_SAMPLE_RATE
+from .database import QueryStats, query_stats, query_log, get_pool_stats
+from .query_plans import capture_slow_query
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle an HTTP request",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"],
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent in database statements per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_statements",
+    "Database statements run per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50),
+)
+
+class PoolCollector:
+    """Reports the connection pool state from get_pool_stats at scrape time."""
+
+    def collect(self):
+        stats = get_pool_stats()
+        for key, description in (
+            ("size", "Connections the pool keeps open"),
+            ("checked_out", "Connections in use"),
+            ("overflow", "Overflow connections in use"),
+            ("utilization", "Share of the pool and overflow in use"),
+        ):
+            yield GaugeMetricFamily(f"db_pool_{key}", description, value=stats[key])
+        yield CounterMetricFamily(
+            "db_pool_waits", "Connections checked out of the pool", value=stats["waits"]
+        )
+        yield CounterMetricFamily(
+            "db_pool_timeouts", "Requests that timed out waiting for a connection", value=stats["timeouts"]
+        )
+
+REGISTRY.register(PoolCollector())
+
+def server_timing(stats: QueryStats, elapsed: float) -> str:
+    """Build a Server-Timing header value from a request's query stats."""
+    return ", ".join([
+        f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries, {stats.rows} rows"',
+        f"db-slowest;dur={stats.slowest_ms:.2f}",
+        f"total;dur={elapsed * 1000:.2f}",
+    ])
+
+def log_statements(stats: QueryStats, labels, path: str, status: int):
+    """Add the statements of a finished sampled request to the query log."""
+    logged_at = datetime.now(timezone.utc).isoformat()
+    method, route = labels
+    for entry in stats.statements:
+        query_log.append({
+            "logged_at": logged_at,
+            "method": method,
+            "route": route,
+            "path": path,
+            "status": status,
+            **entry,
+        })
+
+async def track_request(request: Request, call_next):
+    """
+    Middleware giving each request its own QueryStats, then reporting them in
+    a Server-Timing header and, with the request latency, to Prometheus.
+    Statements of sampled requests are added to the query log, and plans of
+    slow statements are captured.
+    """
+    stats = QueryStats(sampled=QUERY_LOG_SAMPLE_RATE > 0 and random.random() < QUERY_LOG_SAMPLE_RATE)
+    query_stats.set(stats)
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start_time
+        # Label by route template, not by path, to keep the number of series bounded
+        route = request.scope.get("route")
+        labels = (request.method, route.path if route else "unmatched")
+        REQUEST_LATENCY.labels(*labels).observe(elapsed)
+        REQUESTS.labels(*labels, str(status)).inc()
+        REQUEST_DB_TIME.labels(*labels).observe(stats.total_ms / 1000)
+        REQUEST_QUERIES.labels(*labels).observe(stats.count)
+        if stats.statements:
+            log_statements(stats, labels, request.url.path, status)
+        capture_slow_query(stats, *labels, request)
+
+    response.headers["Server-Timing"] = server_timing(stats, elapsed)
+    return response
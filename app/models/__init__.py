@@ -1,6 +1,7 @@
 from .category import Category
 from .developer import Developer
 from .app import App
+from .category_stats import CategoryStats, CategoryYearStats
 from ..database import Base
 
-__all__ = ["Category", "Developer", "App", "Base"]
+__all__ = ["Category", "Developer", "App", "CategoryStats", "CategoryYearStats", "Base"]
@@ -1,9 +1,10 @@
 from sqlalchemy import (
-    Column, Integer, String, ForeignKey, 
+    Column, Integer, BigInteger, String, ForeignKey, 
     Numeric, Date, DateTime, Boolean, Text,
-    Index
+    Index, Computed
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from ..database import Base
 
@@ -49,6 +50,14 @@ class App(Base):
     
     # Metadata
     scraped_time = Column(DateTime)
+    row_hash = Column(BigInteger)  # Hash of the imported row, used by incremental imports
+    
+    # Weighted words of the name and package name for full text search, kept by PostgreSQL
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', replace(coalesce(app_id, ''), '.', ' ')), 'B')",
+        persisted=True
+    )))
     
     # Relationships
     category = relationship("Category", back_populates="apps")
@@ -70,4 +79,13 @@ class App(Base):
               'category_id',
               'released_date',
               'last_updated'),
+        # Keyset pagination of the app list, one per sort key
+        Index('idx_apps_rating_id', 'rating', 'id'),
+        Index('idx_apps_rating_count_id', 'rating_count', 'id'),
+        Index('idx_apps_released_date_id', 'released_date', 'id'),
+        Index('idx_apps_last_updated_id', 'last_updated', 'id'),
+        # Search: ILIKE on the name, full text on search_vector, apps of matched developers
+        Index('idx_apps_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('idx_apps_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_apps_developer_id', 'developer_id'),
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -12,3 +12,8 @@ class Category(Base):
 
     # Relationships
     apps = relationship("App", back_populates="category")
+
+    # Trigram index for name searches with a leading wildcard
+    __table_args__ = (
+        Index('idx_categories_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, Numeric, ForeignKey
+
+from ..database import Base
+
+class CategoryStats(Base):
+    """Per-category totals over apps, kept up to date by the app write handlers."""
+    __tablename__ = "category_stats"
+
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    app_count = Column(BigInteger, nullable=False, default=0)
+    rated_apps = Column(BigInteger, nullable=False, default=0)   # Apps with a rating
+    rating_sum = Column(Numeric, nullable=False, default=0)
+    free_count = Column(BigInteger, nullable=False, default=0)
+    paid_count = Column(BigInteger, nullable=False, default=0)
+
+class CategoryYearStats(Base):
+    """Apps of a category released and last updated in each year."""
+    __tablename__ = "category_year_stats"
+
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    released_count = Column(BigInteger, nullable=False, default=0)
+    updated_count = Column(BigInteger, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, UniqueConstraint
+from sqlalchemy import Column, Integer, String, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -17,4 +17,7 @@ class Developer(Base):
     # Enforce unique constraint on name and email combination
     __table_args__ = (
         UniqueConstraint('name', 'email', name='developers_name_email_key'),
+        # Trigram indexes for name and email searches with a leading wildcard
+        Index('idx_developers_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('idx_developers_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
     )
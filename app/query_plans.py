@@ -0,0 +1,90 @@
+import asyncio
+import json
+import random
+from collections import deque
+from datetime import datetime, timezone
+from itertools import count
+
+from .config import DB_STATEMENT_TIMEOUT_MS, SLOW_QUERY_SAMPLE_RATE, SLOW_QUERY_PLANS
+from .database import engine, query_stats
+
+# Plans of slow statements, newest last
+slow_queries = deque(maxlen=SLOW_QUERY_PLANS)
+_ids = count(1)
+
+# Only one plan is captured at a time, so a burst of slow requests does not
+# also fill the pool with EXPLAIN ANALYZE runs of the same queries
+_capturing = False
+_tasks = set()
+
+def is_read(statement: str) -> bool:
+    """Whether a statement only reads, and can be run again by EXPLAIN ANALYZE."""
+    return statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+def plan_summary(plan):
+    """Top level figures of a JSON plan for the list of slow queries."""
+    if not plan:
+        return None
+    root = plan[0]
+    return {
+        "node_type": root["Plan"]["Node Type"],
+        "total_cost": root["Plan"]["Total Cost"],
+        "plan_rows": root["Plan"]["Plan Rows"],
+        "execution_ms": root.get("Execution Time"),
+    }
+
+async def explain(statement: str, parameters):
+    """
+    Run EXPLAIN for a statement on its own connection and return the JSON plan.
+    Reads are run again with ANALYZE and BUFFERS, writes are only planned.
+    """
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if is_read(statement) else "FORMAT JSON"
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(DB_STATEMENT_TIMEOUT_MS)}")
+        result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", tuple(parameters or ()))
+        plan = result.scalar()
+        # Nothing of the statement is kept
+        await conn.rollback()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+async def _capture(entry):
+    global _capturing
+    # The task copied the request's context, its own statements are not counted
+    query_stats.set(None)
+    try:
+        entry["plan"] = await explain(entry["statement"], entry["parameters"])
+    except Exception as e:
+        entry["error"] = str(e)
+    finally:
+        _capturing = False
+    entry["summary"] = plan_summary(entry.get("plan"))
+    slow_queries.append(entry)
+
+def capture_slow_query(stats, method: str, route: str, request):
+    """
+    Capture the plan of the slowest statement of a finished request, if it was
+    over SLOW_QUERY_MS, in a background task that does not delay the response.
+    """
+    global _capturing
+    if stats.slowest is None or _capturing or random.random() >= SLOW_QUERY_SAMPLE_RATE:
+        return
+    statement, parameters, duration_ms = stats.slowest
+    _capturing = True
+    entry = {
+        "id": next(_ids),
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "method": method,
+        "route": route,
+        "path": request.url.path,
+        # The filters of list_apps, search_apps and other routes
+        "path_params": request.path_params,
+        "query_params": dict(request.query_params),
+        "duration_ms": round(duration_ms, 2),
+        "request_db_ms": round(stats.total_ms, 2),
+        "statement": statement,
+        "parameters": parameters,
+    }
+    task = asyncio.create_task(_capture(entry))
+    # Keep a reference until the task is done, the event loop only holds a weak one
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -1,19 +1,38 @@
-from .app import App, AppCreate, AppDetail, AppList
-from .category import Category, CategoryCreate, CategoryWithApps
+from .app import App, AppCreate, AppDetail, AppList, AppSearchResult
+from .category import Category, CategoryAnalytics, CategoryCreate, CategoryWithApps
 from .developer import Developer, DeveloperCreate, DeveloperWithApps
 
 from pydantic import BaseModel, Field
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Optional
 
 T = TypeVar("T")
 
 class MetadataModel(BaseModel):
-    query_duration_ms: float = Field(..., description="Time taken to process the query in milliseconds")
+    query_duration_ms: float = Field(..., description="Total time spent in database queries in milliseconds")
+    query_count: int = Field(0, description="Number of database statements run for the request")
+    slowest_query_ms: float = Field(0.0, description="Duration of the slowest statement in milliseconds")
+    rows_returned: int = Field(0, description="Rows returned by the database")
+    cached: bool = Field(False, description="Whether the response came from the response cache")
+    total: Optional[int] = Field(None, description="Rows matching the filters, when requested with the total parameter")
+    total_estimated: bool = Field(False, description="Whether total is a planner estimate rather than an exact count")
 
 class ResponseModel(BaseModel, Generic[T]):
     data: T
     metadata: MetadataModel
 
+class PageMetadataModel(MetadataModel):
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, null on the last page")
+
+class PageResponseModel(BaseModel, Generic[T]):
+    data: T
+    metadata: PageMetadataModel
+
+class BulkItemResult(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="created, updated or error")
+    id: Optional[int] = Field(None, description="id of the written row")
+    detail: Optional[str] = Field(None, description="Why the item was not written")
+
 
 # Update forward references for nested models
 App.model_rebuild()
@@ -21,13 +40,15 @@ Category.model_rebuild()
 Developer.model_rebuild()
 AppDetail.model_rebuild()
 AppList.model_rebuild()
+AppSearchResult.model_rebuild()
 CategoryWithApps.model_rebuild()
 DeveloperWithApps.model_rebuild()
 
 
 
 __all__ = [
-    "App", "AppCreate", "AppDetail", "AppList",
-    "Category", "CategoryCreate", "CategoryWithApps",
-    "Developer", "DeveloperCreate", "DeveloperWithApps", "ResponseModel"
+    "App", "AppCreate", "AppDetail", "AppList", "AppSearchResult",
+    "Category", "CategoryAnalytics", "CategoryCreate", "CategoryWithApps",
+    "Developer", "DeveloperCreate", "DeveloperWithApps", "ResponseModel",
+    "PageResponseModel", "BulkItemResult"
 ]
@@ -1,24 +1,29 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List
 from datetime import date, datetime
 from decimal import Decimal
 
+# Range of an integer column
+INT4 = {'ge': -2147483648, 'le': 2147483647}
+
+# Limits match the columns of apps, so a value the database would refuse is
+# rejected with a 422 instead of failing the transaction
 class AppBase(BaseModel):
-    name: str
-    app_id: str
-    rating: Optional[Decimal] = None
-    rating_count: Optional[int] = None
-    installs: Optional[str] = None
-    min_installs: Optional[int] = None
-    max_installs: Optional[int] = None
+    name: str = Field(..., max_length=255)
+    app_id: str = Field(..., max_length=255)
+    rating: Optional[Decimal] = Field(None, gt=Decimal('-9.95'), lt=Decimal('9.95'))  # NUMERIC(2, 1) after rounding
+    rating_count: Optional[int] = Field(None, **INT4)
+    installs: Optional[str] = Field(None, max_length=50)
+    min_installs: Optional[int] = Field(None, **INT4)
+    max_installs: Optional[int] = Field(None, **INT4)
     is_free: bool
-    price: Optional[Decimal] = None
-    currency: Optional[str] = None
-    size: Optional[str] = None
-    min_android: Optional[str] = None
+    price: Optional[Decimal] = Field(None, gt=Decimal('-99999999.995'), lt=Decimal('99999999.995'))  # NUMERIC(10, 2)
+    currency: Optional[str] = Field(None, max_length=3)
+    size: Optional[str] = Field(None, max_length=20)
+    min_android: Optional[str] = Field(None, max_length=50)
     released_date: Optional[date] = None
     last_updated: Optional[date] = None
-    content_rating: Optional[str] = None
+    content_rating: Optional[str] = Field(None, max_length=50)
     privacy_policy_url: Optional[str] = None
     has_ads: Optional[bool] = None
     has_in_app_purchases: Optional[bool] = None
@@ -57,6 +62,10 @@ class AppList(BaseModel):
         'from_attributes': True
     }
 
+class AppSearchResult(AppList):
+    rank: float  # Relevance to the search, higher first
+    matched_field: str  # Best match of the app: name, developer or category
+
 class AppDetail(App):
     category: 'Category'
     developer: 'Developer'
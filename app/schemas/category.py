@@ -1,9 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 
 class CategoryBase(BaseModel):
-    name: str
+    name: str = Field(..., max_length=100)  # Length of categories.name
 
 class CategoryCreate(CategoryBase):
     pass
@@ -21,3 +21,11 @@ class CategoryWithApps(Category):
     model_config = {
         'from_attributes': True
     }
+
+class CategoryAnalytics(Category):
+    app_count: int = 0
+    average_rating: float = 0
+    free_count: int = 0
+    paid_count: int = 0
+    released: Dict[int, int] = {}   # Apps released per year
+    updated: Dict[int, int] = {}    # Apps last updated per year
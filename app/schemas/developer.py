@@ -1,10 +1,11 @@
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from typing import List, Optional, Dict
 
+# Limits match the columns of developers
 class DeveloperBase(BaseModel):
-    name: str
-    website: Optional[str] = None
-    email: Optional[str] = None
+    name: str = Field(..., max_length=255)
+    website: Optional[str] = Field(None, max_length=500)
+    email: Optional[str] = Field(None, max_length=255)
 
 class DeveloperCreate(DeveloperBase):
     pass
@@ -0,0 +1,87 @@
+"""
+List Serialization Benchmark
+
+Measures the cost per row of turning a page of list_apps rows into the response
+body, through the response model as FastAPI does it and through the orjson fast
+path of app/api/fast_json.py, next to the time of the query itself. Rows are
+read from the database configured for the API.
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import select
+
+from app.api.apps import APP_LIST_COLUMNS, list_apps
+from app.api.fast_json import json_response
+from app.database import get_query_metadata, open_session
+from app.main import app
+from app.models import App
+from app.schemas import AppList, PageMetadataModel
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark the serialization of list_apps pages.")
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[100, 500, 1000],
+        help="page sizes to measure (default: 100 500 1000)"
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=50,
+        help="serializations per page size, the fastest is reported (default: 50)"
+    )
+    return parser.parse_args()
+
+def response_field():
+    """Response model field of list_apps, as the route validates it."""
+    return next(route.response_field for route in app.routes if getattr(route, 'endpoint', None) is list_apps)
+
+async def best_of(repeat, serialize):
+    """Fastest of repeated runs of serialize, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await serialize()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+async def benchmark(sizes, repeat):
+    field = response_field()
+    print(f"{'rows':>6} {'query ms':>10} {'model ms':>10} {'model us/row':>13} "
+          f"{'orjson ms':>10} {'orjson us/row':>14} {'speedup':>8}")
+    for size in sizes:
+        async with open_session() as db:
+            query = select(*APP_LIST_COLUMNS).order_by(App.id).limit(size)
+            start = time.perf_counter()
+            rows = (await db.execute(query)).all()
+            query_ms = (time.perf_counter() - start) * 1000
+            metadata = get_query_metadata()
+
+        async def through_model():
+            content = await serialize_response(field=field, response_content={'data': rows, 'metadata': metadata})
+            return JSONResponse(content).body
+
+        async def through_orjson():
+            return json_response(query, rows, AppList, PageMetadataModel(**metadata)).body
+
+        model_ms = await best_of(repeat, through_model)
+        orjson_ms = await best_of(repeat, through_orjson)
+        count = max(len(rows), 1)
+        print(f"{len(rows):>6} {query_ms:>10.2f} {model_ms:>10.2f} {model_ms * 1000 / count:>13.2f} "
+              f"{orjson_ms:>10.2f} {orjson_ms * 1000 / count:>14.2f} {model_ms / orjson_ms:>7.1f}x")
+
+def main():
+    """Main function to run the benchmark."""
+    args = parse_args()
+    asyncio.run(benchmark(args.sizes, args.repeat))
+
+if __name__ == "__main__":
+    main()
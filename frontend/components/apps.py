@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
-from utils.api import fetch_data
+from urllib.parse import urlencode
+from utils.api import API_URL, fetch_data, fetch_frame
 
 def render_app_filters():
     """Render and return filter values for the apps page."""
@@ -27,7 +27,8 @@ def render_app_filters():
             )
             
         with col3:
-            items_per_page = st.selectbox("Items per page", [100, 200, 500, 100000], index=0)
+            # Larger result sets are downloaded with the export button
+            items_per_page = st.selectbox("Items per page", [100, 200, 500], index=0)
             sort_order = st.selectbox("Sort Order", ["Descending", "Ascending"])
             st.markdown("###")  # Spacing
             if st.button("Reset Filters"):
@@ -44,10 +45,9 @@ def render_app_filters():
         "items_per_page": items_per_page
     }, categories
 
-def build_query_params(filters, page, categories):
+def build_query_params(filters, categories):
     """Build query parameters for the API request."""
     params = {
-        "skip": (page - 1) * filters["items_per_page"],
         "limit": filters["items_per_page"]
     }
     
@@ -72,26 +72,39 @@ def render_apps_page():
     """Main apps page render function."""
     st.subheader("App List")
         
-    # Get filters and page number
-    page = int(st.query_params.get("page", 1))
-    page = st.number_input("Page", min_value=1, value=page)
     filters, categories = render_app_filters()
     
     # Build query parameters
-    params = build_query_params(filters, page, categories)
+    params = build_query_params(filters, categories)
+    
+    # Cursors of the pages visited so far, starting over when the filters change
+    if st.session_state.get("apps_params") != params:
+        st.session_state.apps_params = params
+        st.session_state.apps_cursors = [None]
+    cursors = st.session_state.apps_cursors
+    page = len(cursors)
+    if cursors[-1]:
+        params = {**params, "cursor": cursors[-1]}
+    # A planner estimate is enough for the page count and costs no count(*)
+    params = {**params, "total": "estimate"}
     
     # Fetch filtered apps with loading indicator
     with st.spinner("Loading apps..."):
-        apps_response = fetch_data("/apps", params)
-        apps = apps_response["data"] if apps_response else None
+        apps_response = fetch_frame("/apps", params)
+        apps_df = apps_response["data"] if apps_response else None
     
-    if apps:
-        apps_df = pd.DataFrame(apps)
+    if apps_df is not None and not apps_df.empty:
         
         # Display pagination info
         start_idx = (page - 1) * filters["items_per_page"] + 1
-        end_idx = start_idx + len(apps) - 1
-        st.write(f"Showing results {start_idx} to {end_idx} ({apps_response['duration_ms']}ms)")
+        end_idx = start_idx + len(apps_df) - 1
+        total = apps_response["total"]
+        if total is not None:
+            pages = max(1, -(-total // filters["items_per_page"]))
+            st.write(f"Showing results {start_idx} to {end_idx} of about {total:,}, "
+                     f"page {page} of about {pages:,} ({apps_response['duration_ms']}ms)")
+        else:
+            st.write(f"Showing results {start_idx} to {end_idx} ({apps_response['duration_ms']}ms)")
         
         # Display data
         st.dataframe(
@@ -102,17 +115,24 @@ def render_apps_page():
             use_container_width=True
         )
         
+        # The export streams every matching app, not only this page
+        export_params = {
+            key: value for key, value in st.session_state.apps_params.items()
+            if key not in ("limit", "sort_by", "order")
+        }
+        st.link_button("Export all as CSV", f"{API_URL}/apps/export?{urlencode({**export_params, 'format': 'csv'})}")
+        
         # Bottom pagination
         col1, col2 = st.columns([1, 8])
         with col1:
             if page > 1:
                 if st.button("Previous"):
-                    st.query_params["page"] = page-1
+                    cursors.pop()
                     st.rerun()
         with col2:
-            if len(apps) == filters["items_per_page"]:
+            if apps_response["next_cursor"]:
                 if st.button("Next"):
-                    st.query_params["page"] = page+1
+                    cursors.append(apps_response["next_cursor"])
                     st.rerun()
     else:
         st.info("No apps found matching the criteria")
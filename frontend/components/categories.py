@@ -18,15 +18,8 @@ def add_category_form():
                 else:
                     st.error("Failed to add category")
 
-def render_yearly_stats(category_id, category_name):
-    """Render yearly statistics chart for a category."""
-    stats_response = fetch_data(f"/apps/yearly-stats/{category_id}")
-    if not stats_response:
-        st.warning(f"No data available for category: {category_name}")
-        return
-
-    stats = stats_response.get("data", {})
-
+def render_yearly_stats(stats, category_name, duration_ms):
+    """Render yearly statistics chart for a category from its analytics entry."""
     # Get all years from both released and updated stats
     all_years = sorted(set(
         list(stats['released'].keys()) + 
@@ -55,7 +48,7 @@ def render_yearly_stats(category_id, category_name):
     
     # Update layout
     fig.update_layout(
-        title=f'Yearly Statistics for {category_name} ({stats_response.get("duration_ms", 0)}ms)',
+        title=f'Yearly Statistics for {category_name} ({duration_ms}ms)',
         xaxis_title='Year',
         yaxis_title='Number of Apps',
         barmode='group',
@@ -69,9 +62,10 @@ def render_yearly_stats(category_id, category_name):
 def render_categories_page():
     """Main categories page render function."""
     
-    categories_response = fetch_data("/categories")
-    # Get category list for the stats selector
-    categories = categories_response["data"] if categories_response else None
+    # One request gives the list, ratings and yearly statistics of every category
+    analytics_response = fetch_data("/categories/analytics")
+    categories = analytics_response["data"] if analytics_response else None
+    duration_ms = analytics_response.get("duration_ms", 0) if analytics_response else 0
     if categories:
         st.subheader(f"Category Statistics")
         selected_category = st.selectbox(
@@ -80,29 +74,27 @@ def render_categories_page():
             key="stats_category"
         )
         
-    # Get category ID for the selected category
-    category_id = next(c['id'] for c in categories if c['name'] == selected_category)
-    
-    # Get and display average rating
-    rating_stats_response = fetch_data(f"/categories/{category_id}/rating")
-    if rating_stats_response:
-        rating_stats = rating_stats_response["data"]
-        avg_rating = rating_stats["average_rating"]
+        # Get the statistics of the selected category
+        stats = next(c for c in categories if c['name'] == selected_category)
+        
+        # Display average rating
         st.metric(
-            label=f"Average Rating in {selected_category} ({rating_stats_response.get('duration_ms', 0)}ms)",
-            value=f"⭐ {avg_rating:.2f}/5.00"
+            label=f"Average Rating in {selected_category} ({duration_ms}ms)",
+            value=f"⭐ {stats['average_rating']:.2f}/5.00"
         )
-    
-    render_yearly_stats(category_id, selected_category)
+        
+        render_yearly_stats(stats, selected_category, duration_ms)
     
     st.divider()  # Visual separator between sections
 
     st.subheader("Categories")
 
-    categories = categories_response["data"] if categories_response else None
     if categories:
-        st.caption(f"Categories loaded in {categories_response.get('duration_ms', 0)}ms")
-        st.dataframe(pd.DataFrame(categories), use_container_width=True)
+        st.caption(f"Categories loaded in {duration_ms}ms")
+        st.dataframe(
+            pd.DataFrame(categories, columns=['id', 'name', 'app_count', 'average_rating', 'free_count', 'paid_count']),
+            use_container_width=True
+        )
     else:
         st.info("No categories found")
 
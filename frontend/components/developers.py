@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-from utils.api import fetch_data, post_data
+from utils.api import fetch_frame, post_data
 
 def render_developer_filters():
     """Render and return filter values for the developers page."""
@@ -71,17 +70,17 @@ def render_developers_page():
     
     # Display existing developers
     with st.spinner("Loading developers..."):
-        developers_response = fetch_data("/developers", params)
+        developers_response = fetch_frame("/developers", params)
         developers = developers_response["data"] if developers_response else None
     
-    if developers:
+    if developers is not None and not developers.empty:
         # Display pagination info
         start_idx = (page - 1) * filters["items_per_page"] + 1
         end_idx = start_idx + len(developers) - 1
         st.write(f"Showing results {start_idx} to {end_idx} ({developers_response['duration_ms']}ms)")
         
         # Display data
-        st.dataframe(pd.DataFrame(developers), use_container_width=True)
+        st.dataframe(developers, use_container_width=True)
         
         # Bottom pagination
         col1, col2 = st.columns([1, 8])
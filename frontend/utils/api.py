@@ -1,3 +1,6 @@
+import json
+import pandas as pd
+import pyarrow as pa
 import requests
 import streamlit as st
 import time
@@ -26,7 +29,36 @@ def fetch_data(endpoint: str, params=None):
         response_data = response.json()
         return {
             "data": response_data["data"],
-            "duration_ms": response_data["metadata"]["query_duration_ms"]
+            "duration_ms": response_data["metadata"]["query_duration_ms"],
+            "next_cursor": response_data["metadata"].get("next_cursor"),
+            "total": response_data["metadata"].get("total")
+        }
+    except requests.exceptions.ConnectionError:
+        st.error(f"Cannot connect to API at {API_URL}")
+        return None
+    except requests.exceptions.HTTPError as e:
+        st.error(f"HTTP Error: {e}")
+        return None
+    except Exception as e:
+        st.error(f"Error: {e}")
+        return None
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+def fetch_frame(endpoint: str, params=None):
+    """Fetch a list endpoint as an Arrow IPC stream, its rows as a DataFrame."""
+    try:
+        response = requests.get(f"{API_URL}{endpoint}", params=params, headers={"Accept": ARROW_STREAM})
+        response.raise_for_status()
+        # The stream is read in place from the response body and the columns
+        # stay backed by its Arrow buffers instead of being copied into numpy
+        table = pa.ipc.open_stream(pa.py_buffer(response.content)).read_all()
+        metadata = json.loads(table.schema.metadata[b"metadata"])
+        return {
+            "data": table.to_pandas(types_mapper=pd.ArrowDtype),
+            "duration_ms": metadata["query_duration_ms"],
+            "next_cursor": metadata.get("next_cursor"),
+            "total": metadata.get("total")
         }
     except requests.exceptions.ConnectionError:
         st.error(f"Cannot connect to API at {API_URL}")
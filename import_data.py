@@ -1,8 +1,8 @@
 """
 Google Play Store Data Import Script
 
-This script imports data from a CSV file into a PostgreSQL database. It processes the data
-in chunks to minimize memory usage and provides progress bars for all operations.
+This script imports data from a CSV or Parquet file into a PostgreSQL database. It processes
+the data in chunks to minimize memory usage and provides progress bars for all operations.
 
 The script handles three main entities:
 1. Categories - App categories (e.g., Games, Education)
@@ -10,18 +10,55 @@ The script handles three main entities:
 3. Apps - The main app data with references to categories and developers
 """
 
+import argparse
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import numpy as np
 import pandas as pd
 import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from psycopg2.errors import LockNotAvailable
 from psycopg2.extras import execute_values
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.pool import ThreadedConnectionPool
+from collections import ChainMap, Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import time
 from tqdm import tqdm
 
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
 # Configuration
 CSV_PATH = 'data/Google-Playstore.csv'
 CHUNK_SIZE = 10000  # Adjust based on available memory
 BATCH_SIZE = 1000   # Size for database inserts
+CHECKPOINT_PATH = 'data/import_checkpoint.json'  # Progress of incremental imports
+REPORT_PATH = 'data/import_report.json'          # Stage timings of the last import
+PROFILE_PATH = 'data/import_transform.prof'      # cProfile output of --profile
+
+# Tables used by --full-reload: raw rows are loaded into RELOAD_ROWS_TABLE, then
+# deduplicated into RELOAD_TABLE, which replaces apps once its indexes are built
+RELOAD_ROWS_TABLE = 'apps_reload_rows'
+RELOAD_TABLE = 'apps_reload'
+# The swap waits at most SWAP_LOCK_TIMEOUT for the lock on apps, so a long API
+# query cannot queue every other reader behind it, and is retried after a backoff
+SWAP_LOCK_TIMEOUT = '5s'
+SWAP_LOCK_ATTEMPTS = 5
+# Channel the API listens on to drop cached responses of changed tables
+CACHE_CHANNEL = 'api_cache_invalidate'
 DB_PARAMS = {
     'dbname': 'playstore',
     'user': 'postgres',
@@ -30,47 +67,116 @@ DB_PARAMS = {
     'port': '5432'
 }
 
+# Strings read as missing values, the same set pandas.read_csv treats as NaN
+NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+# Arrow-backed dtype of text columns, so strings are never converted to Python objects
+TEXT_DTYPE = pd.ArrowDtype(pa.string())
+
+INT4_MAX = 2147483647
+INT8_MAX = 9223372036854775807
+
+# Columns of the input file used by the import
+SOURCE_COLUMNS = [
+    'App Name', 'App Id', 'Category', 'Rating', 'Rating Count', 'Installs',
+    'Minimum Installs', 'Maximum Installs', 'Free', 'Price', 'Currency', 'Size',
+    'Minimum Android', 'Developer Id', 'Developer Website', 'Developer Email',
+    'Released', 'Last Updated', 'Content Rating', 'Privacy Policy', 'Ad Supported',
+    'In App Purchases', 'Editors Choice', 'Scraped Time'
+]
+
+# Columns of the COPY staging table: the app columns with category and developer
+# natural keys in place of their IDs, which are resolved by the merge step.
+STAGING_COLUMNS = [
+    'name', 'app_id', 'category', 'developer_name', 'developer_website',
+    'developer_email', 'rating', 'rating_count', 'installs', 'min_installs',
+    'max_installs', 'is_free', 'price', 'currency', 'size', 'min_android',
+    'released_date', 'last_updated', 'content_rating', 'privacy_policy_url',
+    'has_ads', 'has_in_app_purchases', 'is_editors_choice', 'scraped_time',
+    'row_hash'
+]
+
+# Columns covered by row_hash, a change in any of them makes an incremental import rewrite the app
+HASH_COLUMNS = [
+    column for column in STAGING_COLUMNS if column not in ('scraped_time', 'row_hash')
+]
+
+# Columns of the apps table in the order used by _insert_apps_batch
+APP_COLUMNS = [
+    'name', 'app_id', 'category_id', 'developer_id', 'rating', 'rating_count',
+    'installs', 'min_installs', 'max_installs', 'is_free', 'price', 'currency',
+    'size', 'min_android', 'released_date', 'last_updated', 'content_rating',
+    'privacy_policy_url', 'has_ads', 'has_in_app_purchases',
+    'is_editors_choice', 'scraped_time', 'row_hash'
+]
+
+APPS_INSERT_CONFLICT = "ON CONFLICT (app_id) DO NOTHING"
+
+# Incremental imports only overwrite an app with a newer scrape whose content changed
+APPS_UPSERT_CONFLICT = f"""
+    ON CONFLICT (app_id) DO UPDATE SET
+        {', '.join(f'{column} = EXCLUDED.{column}' for column in APP_COLUMNS if column != 'app_id')}
+    WHERE apps.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+      AND (apps.scraped_time IS NULL OR apps.scraped_time < EXCLUDED.scraped_time)
+"""
+
 class DataProcessor:
     """Handles data processing and database operations for the import process."""
     
-    def __init__(self, conn):
-        """Initialize with a database connection."""
+    def __init__(self, conn, input_path=CSV_PATH, stats=None, profile_path=None):
+        """
+        Initialize with a database connection and the CSV or Parquet file to import.
+        Stage timings are collected in stats, a new ImportStats by default. With
+        a profile_path, the transform stage is profiled for save_profile.
+        """
         self.conn = conn
+        self.input_path = input_path
+        self.stats = stats or ImportStats()
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile() if profile_path else None
     
-    def clean_numeric(self, value, max_value=2147483647):
+    def clean_numeric(self, values, max_value=INT4_MAX):
         """
-        Convert string numeric values to proper numeric types.
-        Handles PostgreSQL integer limits (max 2^31-1 = 2147483647).
+        Convert a column of numeric strings (e.g. "5,000+") to nullable integers.
+        Values are clipped to the PostgreSQL integer limits given by max_value.
         """
-        if pd.isna(value):
-            return None
-        try:
-            num = int(float(str(value).replace(',', '').replace('+', '')))
-            # Handle PostgreSQL integer limits
-            return min(num, max_value)
-        except (ValueError, TypeError):
-            return None
+        if not pd.api.types.is_numeric_dtype(values):
+            values = as_text(values).str.replace(',', '', regex=False).str.replace('+', '', regex=False)
+        numbers = np.trunc(pd.to_numeric(values, errors='coerce'))
+
+        # Clip before casting, large floats do not fit an int64
+        too_large = numbers > max_value
+        too_small = numbers < -max_value - 1
+        result = numbers.mask(too_large | too_small).astype('Int64')
+        result[too_large] = max_value
+        result[too_small] = -max_value - 1
+        return result
     
-    def clean_price(self, value):
-        """Convert price strings to float values."""
-        if pd.isna(value):
-            return None
-        return float(str(value).replace('$', '').replace(',', ''))
+    def clean_price(self, values):
+        """Convert a column of price strings to floats."""
+        if not pd.api.types.is_numeric_dtype(values):
+            values = as_text(values).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+        return pd.to_numeric(values, errors='coerce')
     
-    def parse_boolean(self, value):
-        """Convert string boolean values to Python booleans."""
-        if pd.isna(value):
-            return False
-        return str(value).lower() == 'true'
+    def parse_boolean(self, values):
+        """Convert a column of boolean strings to booleans, missing values are False."""
+        if not pd.api.types.is_bool_dtype(values):
+            values = as_text(values).str.lower() == 'true'
+        return values.fillna(False).astype(bool)
     
-    def parse_date(self, date_str):
-        """Convert date strings to Python date objects."""
-        if pd.isna(date_str):
-            return None
-        try:
-            return datetime.strptime(date_str, '%b %d, %Y').date()
-        except:
-            return None
+    def parse_date(self, values, date_format='%b %d, %Y'):
+        """
+        Convert a column of date strings to datetimes, invalid values become NaT.
+        Columns that are already dates or timestamps, as in Parquet input, are only cast.
+        """
+        if isinstance(values.dtype, pd.ArrowDtype) and pa.types.is_temporal(values.dtype.pyarrow_dtype):
+            return values.astype('datetime64[ns]')
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values.astype('datetime64[ns]')
+        return pd.to_datetime(as_text(values), format=date_format, errors='coerce')
     
     def get_category_map(self):
         """Get mapping of category names to IDs."""
@@ -78,220 +184,1206 @@ class DataProcessor:
             cur.execute("SELECT id, name FROM categories")
             return {row[1]: row[0] for row in cur.fetchall()}
     
-    def get_developer_map(self):
-        """Get mapping of developer (name, email) to IDs."""
-        with self.conn.cursor() as cur:
-            cur.execute("SELECT id, name, email FROM developers")
-            return {(row[1], row[2]): row[0] for row in cur.fetchall()}
-    
-    def process_categories(self, total_rows):
-        """Process categories in chunks and return category mapping."""
-        print("\nProcessing categories...")
-        categories_set = set()
-        
-        # Read unique categories
-        with tqdm(total=total_rows, desc="Reading categories") as pbar:
-            for chunk in pd.read_csv(CSV_PATH, usecols=['Category'], chunksize=CHUNK_SIZE):
-                categories_set.update(chunk['Category'].unique())
-                pbar.update(len(chunk))
-        
-        # Insert categories in batches
-        categories_df = pd.DataFrame(list(categories_set), columns=['name'])
-        print(f"\nFound {len(categories_df)} unique categories")
-        
-        # Insert in batches
-        batches = range(0, len(categories_df), BATCH_SIZE)
-        with tqdm(total=len(categories_df), desc="Inserting categories") as pbar:
-            for i in batches:
-                batch = categories_df.iloc[i:i + BATCH_SIZE]
-                self._insert_categories_batch(batch)
-                pbar.update(len(batch))
-        
-        # Get category mapping
-        category_map = self.get_category_map()
-        return category_map
-    
-    def process_developers(self, total_rows):
-        """Process developers in chunks and return developer mapping."""
-        print("\nProcessing developers...")
-        developers_set = set()
-        
-        # Read unique developers
-        with tqdm(total=total_rows, desc="Reading developers") as pbar:
-            for chunk in pd.read_csv(CSV_PATH, 
-                                   usecols=['Developer Id', 'Developer Website', 'Developer Email'],
-                                   chunksize=CHUNK_SIZE):
-                chunk_developers = list(zip(chunk['Developer Id'], 
-                                         chunk['Developer Website'].fillna(''),
-                                         chunk['Developer Email'].fillna('')))
-                developers_set.update(chunk_developers)
-                pbar.update(len(chunk))
-        
-        # Insert developers in batches
-        developers_df = pd.DataFrame(list(developers_set), columns=['name', 'website', 'email'])
-        print(f"\nFound {len(developers_df)} unique developers")
-        
-        # Insert in batches
-        batches = range(0, len(developers_df), BATCH_SIZE)
-        with tqdm(total=len(developers_df), desc="Inserting developers") as pbar:
-            for i in batches:
-                batch = developers_df.iloc[i:i + BATCH_SIZE]
-                self._insert_developers_batch(batch)
-                pbar.update(len(batch))
-        
-        # Get developer mapping
-        developer_map = self.get_developer_map()
-        return developer_map
-    
-    def process_apps(self, total_rows, category_map, developer_map):
-        """Process apps in chunks."""
+    def read_chunks(self, desc, skip_rows=0):
+        """
+        Read the input file once in chunks of CHUNK_SIZE rows.
+
+        Chunks are frames of Arrow-backed columns. CSV files are parsed by
+        pyarrow's multi-threaded streaming reader, with every column read as
+        text and progress reported by byte offset, so no line-count pre-pass
+        over the file is needed. Parquet files keep their column types.
+        The first skip_rows data rows are skipped when resuming an import.
+        """
+        if is_parquet(self.input_path):
+            batches = self._read_parquet_batches(desc, skip_rows)
+        else:
+            batches = self._read_csv_batches(desc, skip_rows)
+
+        start = time.perf_counter()
+        for table in rebatch(batches, CHUNK_SIZE):
+            chunk = table.to_pandas(types_mapper=pd.ArrowDtype)
+            self.stats.add('read', time.perf_counter() - start, rows=len(chunk))
+            yield chunk
+            start = time.perf_counter()
+
+    def _read_csv_batches(self, desc, skip_rows=0):
+        """Stream record batches from a CSV file with every column typed as text."""
+        with open(self.input_path, 'rb') as f, tqdm(total=os.path.getsize(self.input_path), desc=desc,
+                                                    unit='B', unit_scale=True, unit_divisor=1024) as pbar:
+            reader = pa_csv.open_csv(
+                f,
+                read_options=pa_csv.ReadOptions(skip_rows_after_names=skip_rows),
+                # Quoted values may span lines, as pandas read them
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                # Read every column as text, a stray value cannot fail the
+                # import halfway through because of an inferred type
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=SOURCE_COLUMNS,
+                    column_types={column: pa.string() for column in SOURCE_COLUMNS},
+                    null_values=NULL_VALUES,
+                    strings_can_be_null=True
+                )
+            )
+            for batch in reader:
+                yield batch
+                self.stats.add('read', 0, size=f.tell() - pbar.n)
+                pbar.update(f.tell() - pbar.n)
+
+    def _read_parquet_batches(self, desc, skip_rows=0):
+        """Stream record batches from a Parquet file, skipping whole row groups when resuming."""
+        parquet_file = pq.ParquetFile(self.input_path)
+        metadata = parquet_file.metadata
+        bytes_per_row = os.path.getsize(self.input_path) / max(metadata.num_rows, 1)
+        row_groups = []
+        for index in range(metadata.num_row_groups):
+            group_rows = metadata.row_group(index).num_rows
+            if skip_rows >= group_rows and not row_groups:
+                skip_rows -= group_rows
+            else:
+                row_groups.append(index)
+
+        with tqdm(total=metadata.num_rows, desc=desc, unit='rows', unit_scale=True) as pbar:
+            pbar.update(metadata.num_rows - sum(metadata.row_group(i).num_rows for i in row_groups))
+            for batch in parquet_file.iter_batches(
+                    batch_size=CHUNK_SIZE, row_groups=row_groups, columns=SOURCE_COLUMNS):
+                if skip_rows:
+                    skipped = min(skip_rows, batch.num_rows)
+                    batch = batch.slice(skipped)
+                    skip_rows -= skipped
+                    pbar.update(skipped)
+                yield null_strings(batch)
+                self.stats.add('read', 0, size=round(batch.num_rows * bytes_per_row))
+                pbar.update(batch.num_rows)
+
+    def process_apps(self, loader='insert', incremental=False, checkpoint=None):
+        """
+        Import categories, developers and apps in a single pass over the input file.
+        Category and developer IDs are resolved or created chunk by chunk, and
+        each chunk of apps is committed with the given loader.
+        """
         print("\nProcessing apps...")
+        skipped_rows = checkpoint.load() if checkpoint else 0
         processed_rows = 0
-        
-        with tqdm(total=total_rows, desc="Importing apps") as pbar:
-            for chunk in pd.read_csv(CSV_PATH, chunksize=CHUNK_SIZE):
-                apps_data = self._process_app_chunk(chunk, category_map, developer_map)
-                self._insert_apps_batch(apps_data)
+        written_rows = 0
+        failed = False
+        category_map = self.get_category_map()
+
+        for chunk in self.read_chunks("Importing apps", skip_rows=skipped_rows):
+            with self.stats.timed('dimensions', rows=len(chunk)):
+                developer_map = self._resolve_dimensions(chunk, category_map)
+            if developer_map is None:
+                # Without its categories or developers the chunk is not written
+                written = None
+            else:
+                payload = self._process_app_chunk(chunk, category_map, developer_map, loader, incremental)
+                written = self.write_apps(payload, loader, incremental)
+            processed_rows += len(chunk)
+            if written is None:
+                failed = True
+            else:
+                written_rows += written
+            # The checkpoint stays before the first failed chunk, so a resumed
+            # import writes it again
+            if checkpoint and not failed:
+                checkpoint.save(skipped_rows + processed_rows)
+
+        print(f"\nFound {len(category_map)} categories")
+        print(f"Wrote {written_rows:,} new or changed apps")
+        if checkpoint:
+            finish_checkpoint(checkpoint, failed)
+        return processed_rows
+
+    def process_apps_copy(self):
+        """
+        Load apps, developers and categories with the COPY loader.
+
+        Every chunk is streamed into a temporary staging table with COPY, then
+        the three target tables are filled by set-based INSERT ... SELECT
+        statements. The whole load runs in a single transaction.
+        """
+        print("\nStaging apps with COPY...")
+        staged_rows = 0
+
+        try:
+            self._create_staging_table()
+            for chunk in self.read_chunks("Staging apps"):
+                staging_data = self._process_staging_chunk(chunk)
+                with self.stats.timed('write', rows=len(staging_data)):
+                    staged_rows += self._copy_rows(
+                        'staging_apps', staging_data,
+                        not_null_columns=('developer_website', 'developer_email')
+                    )
+
+            print(f"\nStaged {staged_rows:,} rows, merging...")
+            with self.stats.timed('merge', rows=staged_rows):
+                inserted = self._merge_staging()
+                self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        print(f"Inserted {inserted['categories']:,} categories, "
+              f"{inserted['developers']:,} developers and {inserted['apps']:,} apps")
+        return staged_rows
+
+    def process_apps_parallel(self, pool, workers, loader, incremental=False, checkpoint=None):
+        """
+        Import apps with a pool of transform processes and concurrent writers.
+
+        This process reads the input file once and resolves or creates category and
+        developer IDs. The category map loaded at startup is inherited
+        read-only by the worker processes. Each chunk carries the IDs of its
+        developers and of categories created during this run. Workers
+        transform chunks into insert-ready payloads, and writer threads load
+        them on separate pooled connections.
+        """
+        print(f"\nProcessing apps with {workers} workers...")
+        skipped_rows = checkpoint.load() if checkpoint else 0
+        processed_rows = 0
+        written_rows = 0
+        failed = False
+        shared_categories = self.get_category_map()
+        created_categories = {}
+        category_map = ChainMap(created_categories, shared_categories)
+
+        # Bound the chunks held in memory while waiting for a worker or writer
+        max_in_flight = 2 * workers
+        transforms = deque()
+        writes = deque()
+
+        # Workers profile into files of their own, merged by save_profile
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_transform_worker,
+                                 initargs=(shared_categories, self.profile_path)) as transformers, \
+             ThreadPoolExecutor(max_workers=workers) as writers:
+
+            def drain(limit):
+                nonlocal written_rows, failed
+                while len(transforms) > limit:
+                    transform, rows_done = transforms.popleft()
+                    if transform is None:
+                        # The dimensions of the chunk failed, it keeps its place
+                        # in line as a failed write
+                        writes.append((None, rows_done))
+                        continue
+                    payload, worker_stats = transform.result()
+                    self.stats.merge(worker_stats)
+                    write = writers.submit(_write_apps_payload, pool, loader, payload, incremental, self.stats)
+                    writes.append((write, rows_done))
+                while len(writes) > limit:
+                    # Writes finish in submission order here, so the checkpoint
+                    # never moves past a chunk that is not committed yet, and
+                    # stays before the first chunk that failed
+                    write, rows_done = writes.popleft()
+                    written = write.result() if write else None
+                    if written is None:
+                        failed = True
+                    else:
+                        written_rows += written
+                    if checkpoint and not failed:
+                        checkpoint.save(rows_done)
+
+            for chunk in self.read_chunks("Importing apps", skip_rows=skipped_rows):
+                with self.stats.timed('dimensions', rows=len(chunk)):
+                    developers = self._resolve_dimensions(chunk, category_map)
+                if developers is None:
+                    transform = None
+                else:
+                    categories = {
+                        name: created_categories[name]
+                        for name in chunk['Category'].dropna().unique()
+                        if name in created_categories
+                    }
+                    transform = transformers.submit(
+                        _transform_chunk_for_load, chunk, categories, developers, loader, incremental
+                    )
                 processed_rows += len(chunk)
-                pbar.update(len(chunk))
-        
+                transforms.append((transform, skipped_rows + processed_rows))
+                drain(max_in_flight)
+            drain(0)
+
+        print(f"\nFound {len(category_map)} categories")
+        print(f"Wrote {written_rows:,} new or changed apps")
+        if checkpoint:
+            finish_checkpoint(checkpoint, failed)
+        return processed_rows
+
+    def process_full_reload(self, pool, workers):
+        """
+        Replace the apps table with a freshly loaded copy.
+
+        Rows are loaded without any index into an UNLOGGED table and
+        deduplicated into a copy of apps, keeping the id of apps that already
+        exist. The indexes and constraints of apps are then built on the copy,
+        several at a time, and the copy is swapped in with a rename. The API
+        keeps reading the old table until the swap commits.
+        """
+        self._create_reload_tables()
+        if workers > 1:
+            processed_rows = self.process_apps_parallel(pool, workers, 'reload')
+        else:
+            processed_rows = self.process_apps('reload')
+
+        print("\nDeduplicating reloaded apps...")
+        with self.stats.timed('merge', rows=processed_rows):
+            self._fill_reload_table()
+
+        indexes, constraints = self._get_apps_indexes()
+        print(f"Building {len(indexes)} indexes...")
+        with self.stats.timed('index_build'):
+            with ThreadPoolExecutor(max_workers=min(len(indexes), pool.maxconn - 1)) as builders:
+                # list() waits for every build and re-raises the first failure
+                list(builders.map(lambda index: _build_reload_index(pool, index), indexes))
+            self._add_reload_constraints(constraints)
+
+        print("Swapping in the reloaded apps table...")
+        with self.stats.timed('swap'):
+            self._swap_reload_table(indexes, constraints)
         return processed_rows
-    
-    def _process_app_chunk(self, chunk, category_map, developer_map):
-        """Process a chunk of app data."""
-        apps_data = []
-        for _, row in chunk.iterrows():
-            dev_id = developer_map.get((row['Developer Id'], row['Developer Email']))
-            category_id = category_map.get(row['Category'])
-            
-            if dev_id is None or category_id is None:
-                continue
 
+    def _create_reload_tables(self):
+        """Create the UNLOGGED tables a full reload loads into."""
+        with self.conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {RELOAD_ROWS_TABLE}, {RELOAD_TABLE}")
+            cur.execute(f"""
+                CREATE UNLOGGED TABLE {RELOAD_ROWS_TABLE} AS
+                SELECT {', '.join(APP_COLUMNS)} FROM apps WITH NO DATA
+            """)
+            # search_vector stays a generated column, filled in as rows are inserted
+            cur.execute(f"CREATE UNLOGGED TABLE {RELOAD_TABLE} (LIKE apps INCLUDING DEFAULTS INCLUDING GENERATED)")
+        self.conn.commit()
+
+    def _fill_reload_table(self):
+        """
+        Move the loaded rows into the reload table, keeping the latest scrape
+        of each app and the id it already has in apps.
+        """
+        columns = ', '.join(f'r.{column}' for column in APP_COLUMNS)
+        with self.conn.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO {RELOAD_TABLE} (id, {', '.join(APP_COLUMNS)})
+                SELECT DISTINCT ON (r.app_id)
+                       COALESCE(a.id, nextval(pg_get_serial_sequence('apps', 'id'))), {columns}
+                FROM {RELOAD_ROWS_TABLE} r
+                LEFT JOIN apps a ON a.app_id = r.app_id
+                ORDER BY r.app_id, r.scraped_time DESC NULLS LAST
+            """)
+            cur.execute(f"DROP TABLE {RELOAD_ROWS_TABLE}")
+            # Written to WAL once here, so the indexes below are built on a crash-safe table
+            cur.execute(f"ALTER TABLE {RELOAD_TABLE} SET LOGGED")
+        self.conn.commit()
+
+    def _get_apps_indexes(self):
+        """
+        Return the (name, definition) of every index on apps, and the
+        (name, type, definition) of its constraints.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT indexname, indexdef FROM pg_indexes
+                WHERE schemaname = current_schema() AND tablename = 'apps'
+            """)
+            indexes = cur.fetchall()
+            cur.execute("""
+                SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+                WHERE conrelid = 'apps'::regclass
+            """)
+            constraints = cur.fetchall()
+        return indexes, constraints
+
+    def _add_reload_constraints(self, constraints):
+        """Add the constraints of apps to the reload table, reusing the indexes already built."""
+        with self.conn.cursor() as cur:
+            for name, contype, definition in constraints:
+                if contype == 'p':
+                    cur.execute(f"ALTER TABLE {RELOAD_TABLE} ADD CONSTRAINT {name}_reload "
+                                f"PRIMARY KEY USING INDEX {name}_reload")
+                elif contype == 'u':
+                    cur.execute(f"ALTER TABLE {RELOAD_TABLE} ADD CONSTRAINT {name}_reload "
+                                f"UNIQUE USING INDEX {name}_reload")
+                else:
+                    cur.execute(f"ALTER TABLE {RELOAD_TABLE} ADD CONSTRAINT {name}_reload {definition}")
+        self.conn.commit()
+
+    def _swap_reload_table(self, indexes, constraints):
+        """Replace apps with the reload table in one transaction and analyze it."""
+        for attempt in range(1, SWAP_LOCK_ATTEMPTS + 1):
             try:
-                app_data = (
-                    row['App Name'],
-                    row['App Id'],
-                    category_id,
-                    dev_id,
-                    float(row['Rating']) if pd.notna(row['Rating']) else None,
-                    self.clean_numeric(row['Rating Count']),
-                    str(self.clean_numeric(row['Installs'], max_value=9223372036854775807)),  # bigint max
-                    self.clean_numeric(row['Minimum Installs']),  # int4 max
-                    self.clean_numeric(row['Maximum Installs']),  # int4 max
-                    self.parse_boolean(row['Free']),
-                    self.clean_price(row['Price']),
-                    row['Currency'],
-                    row['Size'],
-                    row['Minimum Android'],
-                    self.parse_date(row['Released']),
-                    self.parse_date(row['Last Updated']),
-                    row['Content Rating'],
-                    row['Privacy Policy'],
-                    self.parse_boolean(row['Ad Supported']),
-                    self.parse_boolean(row['In App Purchases']),
-                    self.parse_boolean(row['Editors Choice']),
-                    datetime.strptime(row['Scraped Time'], '%Y-%m-%d %H:%M:%S')
+                self._rename_reload_table(indexes, constraints)
+                break
+            except LockNotAvailable:
+                self.conn.rollback()
+                if attempt == SWAP_LOCK_ATTEMPTS:
+                    raise
+                delay = 2 ** attempt
+                print(f"apps is busy, retrying the swap in {delay}s ({attempt}/{SWAP_LOCK_ATTEMPTS})")
+                time.sleep(delay)
+
+        # ANALYZE cannot run inside a transaction block
+        self.conn.autocommit = True
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("ANALYZE apps")
+        finally:
+            self.conn.autocommit = False
+
+    def _rename_reload_table(self, indexes, constraints):
+        """Rename the reload table and its indexes over apps, and commit."""
+        constraint_names = {name for name, _, _ in constraints}
+        with self.conn.cursor() as cur:
+            cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+            cur.execute("LOCK TABLE apps IN ACCESS EXCLUSIVE MODE")
+            cur.execute("ALTER TABLE apps RENAME TO apps_replaced")
+            cur.execute(f"ALTER TABLE {RELOAD_TABLE} RENAME TO apps")
+            # The id sequence belongs to the old table, keep it alive for the new one
+            cur.execute("SELECT pg_get_serial_sequence('apps_replaced', 'id')")
+            sequence = cur.fetchone()[0]
+            cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY apps.id")
+            cur.execute("DROP TABLE apps_replaced")
+
+            for name, _, _ in constraints:
+                cur.execute(f"ALTER TABLE apps RENAME CONSTRAINT {name}_reload TO {name}")
+            for name, _ in indexes:
+                if name not in constraint_names:
+                    cur.execute(f"ALTER INDEX {name}_reload RENAME TO {name}")
+        self.conn.commit()
+
+    def _create_staging_table(self):
+        """Create the temporary staging table used by the COPY loader."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                CREATE TEMP TABLE staging_apps (
+                    name text,
+                    app_id text,
+                    category text,
+                    developer_name text,
+                    developer_website text,
+                    developer_email text,
+                    rating numeric(2, 1),
+                    rating_count integer,
+                    installs text,
+                    min_installs integer,
+                    max_installs integer,
+                    is_free boolean,
+                    price numeric(10, 2),
+                    currency text,
+                    size text,
+                    min_android text,
+                    released_date date,
+                    last_updated date,
+                    content_rating text,
+                    privacy_policy_url text,
+                    has_ads boolean,
+                    has_in_app_purchases boolean,
+                    is_editors_choice boolean,
+                    scraped_time timestamp,
+                    row_hash bigint
+                ) ON COMMIT DROP
+            """)
+
+    def _copy_rows(self, table, frame, not_null_columns=()):
+        """
+        Stream a frame into a table with COPY ... FROM STDIN in CSV format.
+        Missing values are sent as NULL, except that empty strings in
+        not_null_columns are kept as ''.
+        """
+        if frame.empty:
+            return 0
+
+        buffer = io.BytesIO(to_csv_bytes(frame))
+        options = 'FORMAT csv'
+        if not_null_columns:
+            options += f", FORCE_NOT_NULL ({', '.join(not_null_columns)})"
+
+        with self.conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH ({options})",
+                buffer
+            )
+        return len(frame)
+
+    def _merge_staging(self):
+        """Merge the staging table into categories, developers and apps."""
+        inserted = {}
+        with self.conn.cursor() as cur:
+            cur.execute("ANALYZE staging_apps")
+
+            cur.execute("""
+                INSERT INTO categories (name)
+                SELECT DISTINCT category FROM staging_apps
+                ON CONFLICT (name) DO NOTHING
+            """)
+            inserted['categories'] = cur.rowcount
+
+            cur.execute("""
+                INSERT INTO developers (name, website, email)
+                SELECT DISTINCT ON (developer_name, developer_email)
+                       developer_name, developer_website, developer_email
+                FROM staging_apps
+                ORDER BY developer_name, developer_email
+                ON CONFLICT (name, email) DO NOTHING
+            """)
+            inserted['developers'] = cur.rowcount
+
+            cur.execute("""
+                INSERT INTO apps (
+                    name, app_id, category_id, developer_id, rating, rating_count,
+                    installs, min_installs, max_installs, is_free, price, currency,
+                    size, min_android, released_date, last_updated, content_rating,
+                    privacy_policy_url, has_ads, has_in_app_purchases,
+                    is_editors_choice, scraped_time, row_hash
                 )
-                apps_data.append(app_data)
-            except Exception as e:
-                print(f"Error processing row {row['App Id']}: {e}")
-                continue
-                
-        return apps_data
-
-    def _insert_categories_batch(self, categories_df):
-        """Insert a batch of categories into database."""
+                SELECT s.name, s.app_id, c.id, d.id, s.rating, s.rating_count,
+                       s.installs, s.min_installs, s.max_installs, s.is_free, s.price, s.currency,
+                       s.size, s.min_android, s.released_date, s.last_updated, s.content_rating,
+                       s.privacy_policy_url, s.has_ads, s.has_in_app_purchases,
+                       s.is_editors_choice, s.scraped_time, s.row_hash
+                FROM staging_apps s
+                JOIN categories c ON c.name = s.category
+                JOIN developers d ON d.name = s.developer_name AND d.email = s.developer_email
+                ON CONFLICT (app_id) DO NOTHING
+            """)
+            inserted['apps'] = cur.rowcount
+        return inserted
+
+    def transform_chunk(self, chunk):
+        """
+        Clean a raw input chunk one column at a time.
+
+        Returns a frame with STAGING_COLUMNS, where category and developer are
+        still natural keys. Rows without a category, developer or valid scrape
+        time are dropped.
+        """
+        frame = pd.DataFrame({
+            'name': chunk['App Name'],
+            'app_id': chunk['App Id'],
+            'category': chunk['Category'],
+            'developer_name': chunk['Developer Id'],
+            # Developers are stored with '' for a missing website or email
+            'developer_website': chunk['Developer Website'].fillna(''),
+            'developer_email': chunk['Developer Email'].fillna(''),
+            'rating': pd.to_numeric(chunk['Rating'], errors='coerce'),
+            'rating_count': self.clean_numeric(chunk['Rating Count']),
+            'installs': self.clean_numeric(chunk['Installs'], max_value=INT8_MAX).astype(TEXT_DTYPE),
+            'min_installs': self.clean_numeric(chunk['Minimum Installs']),
+            'max_installs': self.clean_numeric(chunk['Maximum Installs']),
+            'is_free': self.parse_boolean(chunk['Free']),
+            'price': self.clean_price(chunk['Price']),
+            'currency': chunk['Currency'],
+            'size': chunk['Size'],
+            'min_android': chunk['Minimum Android'],
+            'released_date': self.parse_date(chunk['Released']),
+            'last_updated': self.parse_date(chunk['Last Updated']),
+            'content_rating': chunk['Content Rating'],
+            'privacy_policy_url': chunk['Privacy Policy'],
+            'has_ads': self.parse_boolean(chunk['Ad Supported']),
+            'has_in_app_purchases': self.parse_boolean(chunk['In App Purchases']),
+            'is_editors_choice': self.parse_boolean(chunk['Editors Choice']),
+            'scraped_time': self.parse_date(chunk['Scraped Time'], date_format='%Y-%m-%d %H:%M:%S'),
+        })
+
+        # Parquet columns that are empty for a whole file may not be strings, cast them
+        # so the same row always gets the same hash
+        text_columns = ['name', 'app_id', 'category', 'developer_name', 'developer_website',
+                        'developer_email', 'currency', 'size', 'min_android', 'content_rating',
+                        'privacy_policy_url']
+        frame[text_columns] = frame[text_columns].astype(TEXT_DTYPE)
+        frame['row_hash'] = pd.util.hash_pandas_object(frame[HASH_COLUMNS], index=False).to_numpy().view(np.int64)
+
+        missing_category = frame['category'].isna()
+        missing_developer = ~missing_category & frame['developer_name'].isna()
+        bad_scraped_time = ~missing_category & ~missing_developer & frame['scraped_time'].isna()
+        self.stats.reject('missing_category', missing_category.sum())
+        self.stats.reject('missing_developer', missing_developer.sum())
+        self.stats.reject('invalid_scraped_time', bad_scraped_time.sum())
+        return frame.loc[~(missing_category | missing_developer | bad_scraped_time), STAGING_COLUMNS]
+
+    def join_dimension_ids(self, frame, category_map, developer_map):
+        """
+        Add category_id and developer_id columns by joining against the maps.
+        Rows whose category or developer is unknown are dropped.
+        """
+        frame = frame.assign(category_id=frame['category'].map(category_map))
+
+        # Look up each distinct developer once, then join the IDs back onto the rows
+        keys = frame[['developer_name', 'developer_email']].drop_duplicates()
+        keys['developer_id'] = [
+            developer_map.get(key)
+            for key in zip(keys['developer_name'], keys['developer_email'])
+        ]
+        frame = frame.merge(keys, on=['developer_name', 'developer_email'], how='left')
+
+        resolved = frame['category_id'].notna() & frame['developer_id'].notna()
+        self.stats.reject('unresolved_dimension', (~resolved).sum())
+        frame = frame[resolved]
+        return frame.astype({'category_id': 'int64', 'developer_id': 'int64'})
+
+    def to_payload(self, frame, loader, incremental=False):
+        """
+        Convert a frame with dimension IDs into what write_apps expects for the
+        loader: a list of row tuples for insert, CSV bytes for the COPY loaders.
+        """
+        if incremental:
+            # An upsert cannot touch the same app twice, keep its latest scrape
+            frame = frame.sort_values('scraped_time').drop_duplicates('app_id', keep='last')
+
+        # Writing in app_id order keeps concurrent writers from deadlocking on duplicates
+        frame = frame[APP_COLUMNS].sort_values('app_id')
+        if loader != 'insert':
+            return to_csv_bytes(frame)
+        frame = frame.astype(object)
+        return list(frame.where(frame.notna(), None).itertuples(index=False, name=None))
+
+    @contextmanager
+    def transform_stage(self, rows):
+        """Time the transform of rows as the transform stage, profiling it if a profiler is set."""
+        with self.stats.timed('transform', rows=rows):
+            if self.profiler:
+                self.profiler.enable()
+            try:
+                yield
+            finally:
+                if self.profiler:
+                    self.profiler.disable()
+
+    def _process_app_chunk(self, chunk, category_map, developer_map, loader='insert', incremental=False):
+        """Process a chunk of app data into a payload for write_apps."""
+        with self.transform_stage(len(chunk)):
+            frame = self.join_dimension_ids(self.transform_chunk(chunk), category_map, developer_map)
+            return self.to_payload(frame, loader, incremental)
+
+    def _process_staging_chunk(self, chunk):
+        """Process a chunk of app data into a staging frame keyed by natural keys."""
+        with self.transform_stage(len(chunk)):
+            return self.transform_chunk(chunk)
+
+    def _resolve_dimensions(self, chunk, category_map):
+        """
+        Resolve the categories and developers of a chunk, see _resolve_categories
+        and _resolve_developers. Returns the developer IDs, or None if either
+        failed, in which case the chunk must not be written: its apps would all
+        be rejected for a missing category or developer.
+        """
+        if not self._resolve_categories(chunk, category_map):
+            return None
+        return self._resolve_developers(chunk)
+
+    def _resolve_categories(self, chunk, category_map):
+        """
+        Create the chunk's unseen categories and add their IDs to category_map.
+        Returns False if the batch failed and was rolled back.
+        """
+        names = [name for name in chunk['Category'].dropna().unique() if name not in category_map]
+        if not names:
+            return True
+
         try:
             with self.conn.cursor() as cur:
-                execute_values(
+                rows = execute_values(
                     cur,
-                    "INSERT INTO categories (name) VALUES %s ON CONFLICT (name) DO NOTHING",
-                    categories_df.values
+                    "INSERT INTO categories (name) VALUES %s ON CONFLICT (name) DO NOTHING RETURNING id, name",
+                    [(name,) for name in names],
+                    fetch=True
                 )
+                category_map.update({name: id_ for id_, name in rows})
+
+                # Categories created by another writer since the map was loaded
+                missing = [name for name in names if name not in category_map]
+                if missing:
+                    cur.execute("SELECT id, name FROM categories WHERE name = ANY(%s)", (missing,))
+                    category_map.update({name: id_ for id_, name in cur.fetchall()})
                 self.conn.commit()
+                return True
         except Exception as e:
             self.conn.rollback()
+            self.stats.fail('categories')
             print(f"Error inserting category batch: {e}")
+            return False
+
+    def _resolve_developers(self, chunk):
+        """
+        Create the chunk's unseen developers and return the IDs of all its
+        developers, keyed by (name, email), or None if the batch failed and
+        was rolled back.
+
+        The chunk's developer keys are staged in a temporary table and joined
+        against developers in the database, so the loader never holds more
+        than one chunk's developers in memory.
+        """
+        developers = (
+            chunk[['Developer Id', 'Developer Website', 'Developer Email']]
+            .dropna(subset=['Developer Id'])
+            .fillna('')
+            .drop_duplicates(subset=['Developer Id', 'Developer Email'])
+            .set_axis(['name', 'website', 'email'], axis=1)
+        )
+        if developers.empty:
+            return {}
 
-    def _insert_developers_batch(self, developers_df):
-        """Insert a batch of developers into database."""
         try:
             with self.conn.cursor() as cur:
-                execute_values(
-                    cur,
-                    """
-                    INSERT INTO developers (name, website, email) 
-                    VALUES %s 
+                cur.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS chunk_developers (
+                        name text, website text, email text
+                    ) ON COMMIT DELETE ROWS
+                """)
+                self._copy_rows('chunk_developers', developers, not_null_columns=('website', 'email'))
+                cur.execute("""
+                    INSERT INTO developers (name, website, email)
+                    SELECT name, website, email FROM chunk_developers
                     ON CONFLICT (name, email) DO NOTHING
-                    """,
-                    developers_df.values
-                )
+                """)
+                cur.execute("""
+                    SELECT d.name, d.email, d.id
+                    FROM chunk_developers k
+                    JOIN developers d ON d.name = k.name AND d.email = k.email
+                """)
+                developer_ids = {(name, email): id_ for name, email, id_ in cur.fetchall()}
                 self.conn.commit()
+                return developer_ids
         except Exception as e:
             self.conn.rollback()
+            self.stats.fail('developers')
             print(f"Error inserting developer batch: {e}")
+            return None
 
-    def _insert_apps_batch(self, apps_data):
-        """Insert a batch of apps into database."""
+    def write_apps(self, payload, loader, incremental=False):
+        """
+        Write a payload built by to_payload and return the number of apps written,
+        or None if the batch failed and was rolled back.
+        The time spent is recorded as the write stage, including the commit.
+        """
+        start = time.perf_counter()
+        if loader == 'reload':
+            written = self._copy_reload_batch(payload)
+        elif loader == 'copy':
+            written = self._copy_apps_batch(payload, incremental)
+        else:
+            written = self._insert_apps_batch(payload, incremental)
+        self.stats.add('write', time.perf_counter() - start, rows=written or 0,
+                       size=len(payload) if loader != 'insert' else 0)
+        return written
+
+    def _insert_apps_batch(self, apps_data, incremental=False):
+        """Insert a batch of apps into database, or upsert it for incremental imports."""
         if not apps_data:
             return 0
             
         try:
             with self.conn.cursor() as cur:
-                execute_values(
+                written = execute_values(
                     cur,
-                    """
-                    INSERT INTO apps (
-                        name, app_id, category_id, developer_id, rating, rating_count,
-                        installs, min_installs, max_installs, is_free, price, currency,
-                        size, min_android, released_date, last_updated, content_rating,
-                        privacy_policy_url, has_ads, has_in_app_purchases,
-                        is_editors_choice, scraped_time
-                    )
+                    f"""
+                    INSERT INTO apps ({', '.join(APP_COLUMNS)})
                     VALUES %s
-                    ON CONFLICT (app_id) DO NOTHING
+                    {APPS_UPSERT_CONFLICT if incremental else APPS_INSERT_CONFLICT}
+                    RETURNING 1
                     """,
-                    apps_data
+                    apps_data,
+                    page_size=BATCH_SIZE,
+                    fetch=True
                 )
                 self.conn.commit()
-                return len(apps_data)
+                return len(written)
         except Exception as e:
             self.conn.rollback()
+            self.stats.fail('apps')
             print(f"Error inserting batch: {e}")
+            return None
+
+    def _copy_apps_batch(self, csv_data, incremental=False):
+        """
+        Insert a batch of apps given as CSV bytes in APP_COLUMNS order.
+        The rows are copied into a temporary table on this connection and
+        merged into apps in one statement. Incremental imports leave out
+        apps whose stored row is as new or has the same row_hash before
+        upserting the rest.
+        """
+        columns = ', '.join(APP_COLUMNS)
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(f"""
+                    CREATE TEMP TABLE IF NOT EXISTS chunk_apps ON COMMIT DELETE ROWS AS
+                    SELECT {columns} FROM apps WITH NO DATA
+                """)
+                cur.copy_expert(
+                    f"COPY chunk_apps ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    io.BytesIO(csv_data)
+                )
+                if incremental:
+                    cur.execute(f"""
+                        INSERT INTO apps ({columns})
+                        SELECT {', '.join(f's.{column}' for column in APP_COLUMNS)}
+                        FROM chunk_apps s
+                        LEFT JOIN apps a ON a.app_id = s.app_id
+                        WHERE a.id IS NULL
+                           OR (a.row_hash IS DISTINCT FROM s.row_hash
+                               AND (a.scraped_time IS NULL OR a.scraped_time < s.scraped_time))
+                        {APPS_UPSERT_CONFLICT}
+                    """)
+                else:
+                    cur.execute(f"""
+                        INSERT INTO apps ({columns})
+                        SELECT {columns} FROM chunk_apps
+                        {APPS_INSERT_CONFLICT}
+                    """)
+                inserted = cur.rowcount
+                self.conn.commit()
+                return inserted
+        except Exception as e:
+            self.conn.rollback()
+            self.stats.fail('apps')
+            print(f"Error copying batch: {e}")
+            return None
+
+    def _copy_reload_batch(self, csv_data):
+        """Append a batch of apps given as CSV bytes to the unindexed full reload table."""
+        try:
+            with self.conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {RELOAD_ROWS_TABLE} ({', '.join(APP_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    io.BytesIO(csv_data)
+                )
+                copied = cur.rowcount
+                self.conn.commit()
+                return copied
+        except Exception as e:
+            self.conn.rollback()
+            self.stats.fail('apps')
+            print(f"Error copying batch: {e}")
+            return None
+
+    def rebuild_category_stats(self):
+        """
+        Recompute category_stats and category_year_stats from apps in one pass.
+        The API updates them row by row, an import replaces them.
+        """
+        with self.stats.timed('category_stats'), self.conn.cursor() as cur:
+            # API writes adding their deltas wait for the rebuild instead of being lost
+            cur.execute("LOCK TABLE category_stats, category_year_stats IN EXCLUSIVE MODE")
+            cur.execute("DELETE FROM category_stats")
+            cur.execute("DELETE FROM category_year_stats")
+            cur.execute("""
+                INSERT INTO category_stats (category_id, app_count, rated_apps, rating_sum, free_count, paid_count)
+                SELECT category_id, count(*), count(rating), coalesce(sum(rating), 0),
+                       count(*) FILTER (WHERE is_free), count(*) FILTER (WHERE NOT is_free)
+                FROM apps
+                WHERE category_id IS NOT NULL
+                GROUP BY category_id
+            """)
+            cur.execute("""
+                INSERT INTO category_year_stats (category_id, year, released_count, updated_count)
+                SELECT category_id, year, sum(released), sum(updated)
+                FROM apps
+                CROSS JOIN LATERAL (VALUES
+                    (extract(year FROM released_date)::int, 1, 0),
+                    (extract(year FROM last_updated)::int, 0, 1)
+                ) AS dates (year, released, updated)
+                WHERE category_id IS NOT NULL AND year IS NOT NULL
+                GROUP BY category_id, year
+            """)
+        self.conn.commit()
+
+def is_parquet(path):
+    """Return whether the input file is Parquet, judged by its extension."""
+    return path.lower().endswith(('.parquet', '.pq'))
+
+def as_text(values):
+    """Return a column as Arrow-backed strings."""
+    return values if values.dtype == TEXT_DTYPE else values.astype(TEXT_DTYPE)
+
+def null_strings(batch):
+    """
+    Replace NULL_VALUES in the text columns of a record batch with nulls, as
+    the CSV reader does, so both formats import the same data.
+    """
+    columns = []
+    for column in batch.columns:
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            missing = pc.is_in(column, value_set=pa.array(NULL_VALUES, type=column.type))
+            column = pc.if_else(missing, pa.scalar(None, type=column.type), column)
+        columns.append(column)
+    # Fields declared non-nullable in the file may now hold nulls
+    return pa.RecordBatch.from_arrays(columns, schema=pa.schema(
+        [field.with_nullable(True) for field in batch.schema], metadata=batch.schema.metadata))
+
+def rebatch(batches, size):
+    """Regroup a stream of record batches into tables of size rows, the last one may be shorter."""
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, size)
+            pending = table.slice(size).to_batches()
+            pending_rows -= size
+    if pending_rows:
+        yield pa.Table.from_batches(pending)
+
+def to_csv_bytes(frame):
+    """
+    Write a frame as headerless CSV for COPY with pyarrow's CSV writer.
+    Strings are always quoted and missing values are left empty, so COPY
+    reads '' as an empty string and only missing values as NULL.
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    buffer = pa.BufferOutputStream()
+    pa_csv.write_csv(table, buffer, write_options=pa_csv.WriteOptions(include_header=False))
+    return buffer.getvalue().to_pybytes()
+
+class ImportCheckpoint:
+    """Records how many input rows an incremental import has committed, so it can resume."""
+
+    def __init__(self, path, input_path):
+        """Initialize for the checkpoint file path and the file being imported."""
+        self.path = path
+        stat = os.stat(input_path)
+        self.source = {
+            'input': os.path.abspath(input_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime
+        }
+
+    def load(self):
+        """Return the rows already committed, or 0 if there is nothing to resume for this file."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+        if state.get('source') != self.source:
+            print("Ignoring checkpoint written for a different input file")
             return 0
+        print(f"Resuming after {state['rows_done']:,} rows")
+        return state['rows_done']
+
+    def save(self, rows_done):
+        """Record that the first rows_done rows are committed."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'source': self.source, 'rows_done': rows_done}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Remove the checkpoint once the import has finished."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class ImportStats:
+    """
+    Collects the time, rows and bytes of each import stage, rejected rows by
+    reason and failed batches, and turns them into the import report.
+    Stages are recorded from writer threads too, so updates take a lock.
+    """
+
+    def __init__(self):
+        """Initialize with no stages recorded."""
+        self.stages = {}
+        self.rejected = Counter()
+        self.failed_batches = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, rows=0, size=0):
+        """Add seconds spent, rows handled and bytes handled to a stage."""
+        with self._lock:
+            totals = self.stages.setdefault(stage, {'seconds': 0.0, 'rows': 0, 'bytes': 0})
+            totals['seconds'] += seconds
+            totals['rows'] += int(rows)
+            totals['bytes'] += int(size)
+
+    @contextmanager
+    def timed(self, stage, rows=0, size=0):
+        """Time the enclosed block as part of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, rows, size)
+
+    def reject(self, reason, rows):
+        """Count rows dropped from the import for a reason."""
+        if rows:
+            with self._lock:
+                self.rejected[reason] += int(rows)
+
+    def fail(self, table):
+        """Count a batch for a table that failed to write and was rolled back."""
+        with self._lock:
+            self.failed_batches[table] += 1
+
+    def state(self):
+        """Return the recorded stats as plain data, to send them back from a worker process."""
+        return {'stages': self.stages, 'rejected': dict(self.rejected),
+                'failed_batches': dict(self.failed_batches)}
+
+    def merge(self, state):
+        """Add stats returned by state() in a worker process."""
+        for stage, totals in state['stages'].items():
+            self.add(stage, totals['seconds'], totals['rows'], totals['bytes'])
+        for reason, rows in state['rejected'].items():
+            self.reject(reason, rows)
+        with self._lock:
+            self.failed_batches.update(state['failed_batches'])
+
+    def report(self, **details):
+        """Build the import report, with details such as the input and mode added at the top."""
+        stages = {}
+        for stage, totals in self.stages.items():
+            seconds = totals['seconds']
+            stages[stage] = {
+                **totals,
+                'rows_per_s': totals['rows'] / seconds if seconds and totals['rows'] else None,
+                'bytes_per_s': totals['bytes'] / seconds if seconds and totals['bytes'] else None
+            }
+        return {
+            **details,
+            'stages': stages,
+            'rejected_rows': dict(self.rejected),
+            'failed_batches': dict(self.failed_batches),
+            'peak_rss_bytes': peak_rss(resource.RUSAGE_SELF) if resource else None,
+            # Only transform workers that have exited are included
+            'peak_worker_rss_bytes': peak_rss(resource.RUSAGE_CHILDREN) if resource else None
+        }
+
+def peak_rss(who):
+    """Return the peak resident set size in bytes of the process or its children."""
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss * 1024
+
+def print_report(report):
+    """Print the stage timings and rejected rows of an import report."""
+    print(f"\n{'Stage':<14}{'Seconds':>10}{'Rows':>12}{'Rows/s':>12}{'MB/s':>10}")
+    for stage, totals in report['stages'].items():
+        rows_per_s = f"{totals['rows_per_s']:,.0f}" if totals['rows_per_s'] else '-'
+        mb_per_s = f"{totals['bytes_per_s'] / 2**20:,.1f}" if totals['bytes_per_s'] else '-'
+        print(f"{stage:<14}{totals['seconds']:>10.2f}{totals['rows']:>12,}{rows_per_s:>12}{mb_per_s:>10}")
+    for reason, rows in report['rejected_rows'].items():
+        print(f"Rejected {rows:,} rows: {reason}")
+    for table, batches in report['failed_batches'].items():
+        print(f"Failed {batches:,} {table} batches")
+    if report['peak_rss_bytes']:
+        print(f"Peak RSS: {report['peak_rss_bytes'] / 2**20:,.0f} MB")
+
+def save_profile(profiler, path):
+    """
+    Write the transform profile to path, merging the profiles written by
+    transform worker processes.
+    """
+    worker_files = glob.glob(f"{glob.escape(path)}.*")
+    profiles = ([profiler] if profiler.getstats() else []) + worker_files
+    if profiles:
+        pstats.Stats(*profiles).dump_stats(path)
+        print(f"Transform profile written to {path}")
+    for worker_file in worker_files:
+        os.remove(worker_file)
+
+# Category map inherited by each transform worker process, and its profiler for --profile
+_worker_category_map = {}
+_worker_profiler = None
+_worker_profile_path = None
+
+def _init_transform_worker(category_map, profile_path=None):
+    """Keep the category map shared with a transform worker process, and start its profiler."""
+    global _worker_category_map, _worker_profiler, _worker_profile_path
+    _worker_category_map = category_map
+    if profile_path:
+        _worker_profiler = cProfile.Profile()
+        _worker_profile_path = f"{profile_path}.{os.getpid()}"
+
+def _transform_chunk_for_load(chunk, categories, developers, loader, incremental):
+    """
+    Transform a chunk in a worker process into a payload for _write_apps_payload.
+    categories holds the IDs created since the workers started, developers
+    the IDs of the chunk's developers. Returns the payload and the worker's
+    stats for ImportStats.merge.
+    """
+    processor = DataProcessor(None)
+    processor.profiler = _worker_profiler
+    payload = processor._process_app_chunk(
+        chunk, {**_worker_category_map, **categories}, developers, loader, incremental
+    )
+    if _worker_profiler:
+        # Workers are never told they are done, so the profile is saved after every chunk
+        _worker_profiler.dump_stats(_worker_profile_path)
+    return payload, processor.stats.state()
+
+def finish_checkpoint(checkpoint, failed):
+    """Clear the checkpoint of a finished import, or keep it before the first failed chunk."""
+    if failed:
+        print("Some chunks failed to write, run the import again to resume from the first of them")
+    else:
+        checkpoint.clear()
+
+def _write_apps_payload(pool, loader, payload, incremental, stats):
+    """Write a transformed chunk on a connection taken from the pool."""
+    conn = pool.getconn()
+    try:
+        return DataProcessor(conn, stats=stats).write_apps(payload, loader, incremental)
+    finally:
+        pool.putconn(conn)
+
+def _build_reload_index(pool, index):
+    """Build one index of apps on the reload table, on a connection taken from the pool."""
+    name, definition = index
+    definition = re.sub(r' INDEX \S+ ON (ONLY )?(\S+\.)?apps ',
+                        f' INDEX {name}_reload ON \\2{RELOAD_TABLE} ', definition, count=1)
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(definition)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+def rebuild_category_stats(processor):
+    """Rebuild the category statistics after an import, whether or not it completed."""
+    print("Rebuilding category statistics...")
+    try:
+        processor.conn.rollback()
+        processor.rebuild_category_stats()
+    except psycopg2.Error as e:
+        processor.conn.rollback()
+        print(f"Could not rebuild category statistics: {e}")
+
+def notify_cache_invalidation(conn):
+    """Tell running API workers to drop their cached responses of the imported tables."""
+    try:
+        conn.rollback()
+        with conn.cursor() as cur:
+            for table in ('categories', 'developers', 'apps'):
+                cur.execute("SELECT pg_notify(%s, %s)", (CACHE_CHANNEL, table))
+        conn.commit()
+    except psycopg2.Error as e:
+        print(f"Could not notify the API of the import: {e}")
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Import Google Play Store data into PostgreSQL.")
+    parser.add_argument(
+        '--input',
+        default=CSV_PATH,
+        help=f"CSV or Parquet file to import, Parquet is detected by its .parquet or .pq "
+             f"extension (default: {CSV_PATH})"
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="number of transform processes and database writers (default: 1, no parallelism)"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--incremental',
+        action='store_true',
+        help="upsert apps whose scrape is newer and whose content changed, skipping "
+             "unchanged rows, and checkpoint progress so an interrupted import resumes"
+    )
+    mode.add_argument(
+        '--full-reload',
+        action='store_true',
+        help="load apps into an unlogged, unindexed copy, build its indexes in parallel "
+             "and swap it in for the apps table (always uses COPY)"
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=CHECKPOINT_PATH,
+        help=f"checkpoint file for --incremental (default: {CHECKPOINT_PATH})"
+    )
+    parser.add_argument(
+        '--report',
+        default=REPORT_PATH,
+        help=f"JSON file the stage timings, rejected rows and peak memory are written to "
+             f"(default: {REPORT_PATH})"
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=PROFILE_PATH,
+        help=f"write a cProfile of the transform stage to this file (default: {PROFILE_PATH})"
+    )
+    parser.add_argument(
+        '--loader',
+        choices=['insert', 'copy'],
+        default='insert',
+        help="insert: batched INSERT statements per entity; "
+             "copy: COPY into a staging table followed by set-based merges"
+    )
+    return parser.parse_args()
 
 def main():
     """Main function to run the import process."""
-    # Create a connection pool
-    pool = SimpleConnectionPool(1, 10, **DB_PARAMS)
+    args = parse_args()
+
+    # Create a connection pool, parallel writers each take their own connection
+    pool = ThreadedConnectionPool(1, max(10, args.workers + 1), **DB_PARAMS)
     conn = pool.getconn()
+    stats = ImportStats()
+    processor = DataProcessor(conn, args.input, stats, args.profile)
+    loader = 'full reload' if args.full_reload else f"{args.loader} loader"
+    status = 'failed'
+    started_at = datetime.now()
+    start_time = time.time()
     
     try:
-        # Get total rows for progress tracking
-        total_rows = sum(1 for _ in open(CSV_PATH)) - 1
-        
         print("Starting data import...")
-        start_time = time.time()
-        
-        # Initialize processor
-        processor = DataProcessor(conn)
+        if args.profile:
+            # Drop worker profiles left behind by an interrupted run
+            save_profile(cProfile.Profile(), args.profile)
         
-        # Process each entity
-        category_map = processor.process_categories(total_rows)
-        developer_map = processor.process_developers(total_rows)
-        processed_rows = processor.process_apps(total_rows, category_map, developer_map)
+        checkpoint = ImportCheckpoint(args.checkpoint, args.input) if args.incremental else None
+        if args.full_reload:
+            processed_rows = processor.process_full_reload(pool, args.workers)
+        elif args.workers > 1:
+            processed_rows = processor.process_apps_parallel(
+                pool, args.workers, args.loader, args.incremental, checkpoint
+            )
+        elif args.loader == 'copy' and not args.incremental:
+            processed_rows = processor.process_apps_copy()
+        else:
+            processed_rows = processor.process_apps(args.loader, args.incremental, checkpoint)
         
         # Print summary
         end_time = time.time()
+        elapsed = end_time - start_time
         print(f"\nData import completed successfully!")
-        print(f"Total time: {end_time - start_time:.2f} seconds")
+        print(f"Total time: {elapsed:.2f} seconds")
         print(f"Processed {processed_rows:,} rows")
+        print(f"Throughput: {processed_rows / elapsed:,.0f} rows/s ({loader}, {args.workers} workers)")
+        status = 'completed'
             
     except Exception as e:
         print(f"Error: {e}")
     finally:
+        # Batches committed before a failure are in the tables too
+        rebuild_category_stats(processor)
+        notify_cache_invalidation(conn)
         pool.putconn(conn)
         pool.closeall()
 
+    # Failed imports get a report too, it shows how far they got
+    elapsed = time.time() - start_time
+    report = stats.report(
+        status=status,
+        started_at=started_at.isoformat(timespec='seconds'),
+        input=os.path.abspath(args.input),
+        mode=loader,
+        incremental=args.incremental,
+        workers=args.workers,
+        elapsed_seconds=elapsed,
+        rows=stats.stages.get('read', {}).get('rows', 0),
+        rows_per_s=stats.stages.get('read', {}).get('rows', 0) / elapsed
+    )
+    print_report(report)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+    if args.profile:
+        save_profile(processor.profiler, args.profile)
+
 if __name__ == "__main__":
     main()
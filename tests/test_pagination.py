@@ -0,0 +1,84 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, Numeric, Table, create_engine, insert, select
+
+from app.api.pagination import decode_cursor, encode_cursor, keyset_order, keyset_page
+
+metadata = MetaData()
+items = Table(
+    "items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("score", Numeric(2, 1)),
+)
+
+# Repeated scores, so id breaks ties, and NULLs spread through the ids
+SCORES = [Decimal("2.5"), None, Decimal("1.0"), Decimal("2.5"), None, Decimal("4.0"),
+          None, Decimal("1.0"), Decimal("2.5"), None, Decimal("3.5"), None]
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.connect() as connection:
+        connection.execute(insert(items), [{"id": id, "score": score} for id, score in enumerate(SCORES, 1)])
+        yield connection
+
+def expected_ids(order):
+    rows = list(enumerate(SCORES, 1))
+    values = sorted((score, id) for id, score in rows if score is not None)
+    nulls = sorted(id for id, score in rows if score is None)
+    if order == "desc":
+        return nulls[::-1] + [id for _, id in values[::-1]]
+    return [id for _, id in values] + nulls
+
+def walk(connection, order, limit):
+    """Ids of every page in turn, each after the last row of the previous one."""
+    query = select(items.c.id, items.c.score)
+    page = connection.execute(
+        query.order_by(*keyset_order(items.c.score, items.c.id, order)).limit(limit)
+    ).all()
+    ids = []
+    while page:
+        ids += [row.id for row in page]
+        last = page[-1]
+        page = connection.execute(
+            keyset_page(query, items.c.score, items.c.id, order, last.score, last.id, limit)
+        ).all()
+    return ids
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 20])
+def test_pages_cross_the_null_boundary_in_order(connection, order, limit):
+    assert walk(connection, order, limit) == expected_ids(order)
+
+def test_ascending_pages_put_nulls_last(connection):
+    ids = walk(connection, "asc", 4)
+    assert [SCORES[id - 1] for id in ids][-SCORES.count(None):] == [None] * SCORES.count(None)
+
+def test_descending_pages_put_nulls_first(connection):
+    ids = walk(connection, "desc", 4)
+    assert [SCORES[id - 1] for id in ids][:SCORES.count(None)] == [None] * SCORES.count(None)
+
+@pytest.mark.parametrize("sort_by, value, value_type", [
+    ("rating", Decimal("4.5"), Decimal),
+    ("rating_count", 1200, int),
+    ("released_date", date(2021, 3, 4), date),
+    ("rating", None, Decimal),
+])
+def test_cursor_round_trip(sort_by, value, value_type):
+    cursor = encode_cursor(sort_by, "desc", value, 42)
+    assert decode_cursor(cursor, sort_by, "desc", value_type) == (value, 42)
+
+def test_cursor_for_another_sort_is_rejected():
+    cursor = encode_cursor("rating", "desc", Decimal("4.5"), 42)
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "rating", "asc", Decimal)
+    assert error.value.status_code == 400
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor", "rating", "desc", Decimal)
+    assert error.value.status_code == 400
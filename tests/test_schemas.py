@@ -0,0 +1,25 @@
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import AppCreate
+
+APP = {"name": "Notes", "app_id": "com.example.notes", "is_free": True, "category_id": 1, "developer_id": 1}
+
+@pytest.mark.parametrize("field, value", [
+    ("name", "x" * 256),
+    ("currency", "EURO"),
+    ("size", "x" * 21),
+    ("rating", Decimal("9.95")),
+    ("rating_count", 2 ** 31),
+    ("price", Decimal("100000000")),
+])
+def test_values_the_columns_cannot_hold_are_rejected(field, value):
+    with pytest.raises(ValidationError):
+        AppCreate(**{**APP, field: value})
+
+def test_values_at_the_column_limits_are_accepted():
+    app = AppCreate(**{**APP, "name": "x" * 255}, currency="EUR", rating=Decimal("4.5"),
+                    rating_count=2 ** 31 - 1, price=Decimal("99999999.99"))
+    assert app.currency == "EUR"